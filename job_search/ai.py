@@ -1,11 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import cache
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
 from pathlib import Path
+import random
+import sqlite3
+import threading
+import time
+import urllib.request
 
-from IPython.display import Markdown, display
-import lmstudio as lms
+from job_search.config import LMS_URL, P_LLM_CACHE, P_RESUME
 
-from job_search.config import P_RESUME
-from job_search.resume import analyze
+LLM_MODEL = "qwen/qwen3-4b-2507"
 
 PROMPT_ATS = "Pretend you are an advanced Applicant Tracking System. Read the job description below and extract industry keywords and output a bulleted list. Ignore keywords about employee benefits:"
 PROMPT_7 = "Summarize top seven job requirements (domain area, expertise, soft skills) and top seven nice-to-haves. Ignore details of location, compensation, travel, benefits. Format as concise bullet points:"
@@ -19,11 +26,15 @@ def load_md(_md, verbose=False):
         with open(_md) as f:
             _md = f.read()
     if verbose:
+        from IPython.display import Markdown, display
+
         display(Markdown(str(_md)))
     else:
         return str(_md)
 
 def load_resume38(verbose=False):
+    from job_search.resume import analyze
+
     resume38 = analyze(P_RESUME).iloc[3:38]['_markdown'].pipe('\n'.join)
     return load_md(resume38, verbose)
 
@@ -33,13 +44,154 @@ def llm_extract(_md, prompt=PROMPT_7, model="qwen/qwen3-4b-2507", verbose=False)
     return llm_respond(_message, model=model, verbose=verbose)
 
 def llm_respond(_md, model="qwen/qwen3-4b-2507", verbose=True):
-    result = _llm_respond(_md)
+    result = _llm_respond(_md, model)
     return load_md(result, verbose)
 
 
 @cache
 def _llm_respond(message, model="qwen/qwen3-4b-2507"):
+    import lmstudio as lms
+
     message = load_md(message)
     _model = lms.llm(model)
     result = _model.respond(message)
     return result
+
+
+################################################################################
+# Batch extraction
+################################################################################
+
+_lock = threading.Lock()
+
+
+@cache
+def _connect(path: Path = P_LLM_CACHE) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(path, check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS responses (
+            model TEXT, prompt TEXT, hash TEXT, response TEXT, time REAL,
+            PRIMARY KEY (model, prompt, hash)
+        )
+    """)
+    return con
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()[:16]
+
+
+def load_extractions(hashes=None, prompt=PROMPT_7, model=LLM_MODEL, path: Path = P_LLM_CACHE) -> dict[str, str]:
+    """Cached responses for `prompt` and `model`, keyed by job hash (all when `hashes` is None)"""
+    con = _connect(path)
+    rows = con.execute(
+        "SELECT hash, response FROM responses WHERE model = ? AND prompt = ?",
+        (model, prompt_hash(prompt)),
+    ).fetchall()
+    if hashes is None:
+        return dict(rows)
+    hashes = set(hashes)
+    return {hash: response for hash, response in rows if hash in hashes}
+
+
+def chat_completion(message: str, model=LLM_MODEL, base_url=LMS_URL, timeout=600) -> str:
+    """One request to an OpenAI-compatible `/chat/completions` endpoint (LM Studio server)"""
+    body = json.dumps({"model": model, "messages": [{"role": "user", "content": message}]})
+    request = urllib.request.Request(
+        f"{base_url}/chat/completions", body.encode(), {"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)["choices"][0]["message"]["content"]
+
+
+def llm_extract_many(hashes, prompt=PROMPT_7, model=LLM_MODEL, concurrency=4, texts=None,
+                     base_url=LMS_URL, refresh=False, path: Path = P_LLM_CACHE) -> dict[str, str]:
+    """`llm_extract` for many jobs, `concurrency` requests at a time
+
+    Responses are cached on disk by (model, prompt hash, job hash); cached jobs are skipped
+    unless `refresh`. Failed requests are reported and left out of the result.
+
+    Args:
+        hashes (Iterable[str]): job hashes
+        prompt (str): e.g. PROMPT_7 or PROMPT_ATS
+        texts (dict[str, str], optional): markdown per hash (default: `_md` of `load_jobs()`)
+
+    Returns:
+        dict[str, str]: response per hash
+    """
+    hashes = list(dict.fromkeys(hashes))
+    results = {} if refresh else load_extractions(hashes, prompt, model, path)
+    todo = [hash for hash in hashes if hash not in results]
+    if todo and texts is None:
+        from job_search.jobs import get_many
+
+        _rows = get_many(todo)
+        texts = dict(zip(_rows["_hash"], _rows["_md"]))
+    todo = [hash for hash in todo if texts.get(hash) is not None]
+    _prompt_hash = prompt_hash(prompt)
+    con = _connect(path)
+
+    def _extract(hash: str) -> str:
+        return chat_completion(f"{prompt}\n\n{load_md(texts[hash])}", model, base_url)
+
+    t0 = time.perf_counter()
+    n_failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(_extract, hash): hash for hash in todo}
+        for future in as_completed(futures):
+            hash = futures[future]
+            try:
+                results[hash] = future.result()
+            except Exception as e:
+                n_failed += 1
+                print(f"Failed {hash}: {e!r}")
+                continue
+            with _lock, con:
+                con.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (model, _prompt_hash, hash, results[hash], time.time()),
+                )
+    if todo:
+        elapsed = time.perf_counter() - t0
+        print(f"Extracted {len(todo) - n_failed:,} jobs in {elapsed:,.1f}s "
+              f"({(len(todo) - n_failed) / elapsed:,.2f} jobs/s, {len(hashes) - len(todo):,} cached)")
+    return {hash: results[hash] for hash in hashes if hash in results}
+
+
+def serve_mock_llm(port=0, latency=(0.5, 1.0), slots=4):
+    """Stand-in for the LM Studio server at http://127.0.0.1:{port}/v1 (offline benchmarks)
+
+    `/chat/completions` answers after `random.uniform(*latency)` seconds, with at most
+    `slots` requests generating at once like a local model's parallel slots.
+
+    Returns:
+        (ThreadingHTTPServer, str): running server (stop with `.shutdown()`) and its base url
+    """
+    _slots = threading.Semaphore(slots)
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            message = request["messages"][-1]["content"]
+            with _slots:
+                time.sleep(random.uniform(*latency))
+            content = f"- Mock response ({len(message):,} characters)"
+            body = json.dumps({
+                "model": request["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1"
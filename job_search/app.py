@@ -1,8 +1,152 @@
+"""
+Streamlit explorer over the jobs corpus
+
+The jobs frame, keyword index, named masks and tool index are loaded once per server with
+`st.cache_resource`. A rerun only combines packed-bit masks (cached per filter with
+`st.cache_data`) and sends the 50 rows of the current page to the browser.
+
+Usage:
+$ streamlit run job_search/app.py
+"""
+
+from html import escape
+import time
+
+import numpy as np
 import streamlit as st
 
-import job_search.jobs as jobs
+from job_search import jobs
+from job_search.config import VIEW_JOB_HTTPS
+from job_search.index import Mask, is_plain
+from job_search.utils import highlight
+
+PAGE_SIZE = 50
+N_TOOLS = 1000
+SHOW_COLS = ['estimated_publish_date', 'company_name', 'title', 'seniority_level',
+             'workplace_type', 'formatted_workplace_location', 'requirements_summary']
+FLAGS = {'Any': None, 'Yes': True, 'No': False}
+
+
+@st.cache_resource
+def load_explorer() -> dict:
+    """Jobs frame and indexes shared by every session, plus the newest-first row order
+
+    Rows are positions in the keyword index universe (`load_index().universe`).
+    """
+    jobs_df = jobs.load_jobs()
+    index = jobs.load_index()
+    universe = index.universe
+    # index row of each jobs_df row (tool index rows follow jobs_df)
+    universe_rows = universe.get_indexer(jobs_df['_hash'])
+    frame_rows = np.full(len(universe), -1, dtype=np.int64)
+    frame_rows[universe_rows[universe_rows >= 0]] = np.flatnonzero(universe_rows >= 0)
+    _newest = jobs_df['estimated_publish_date'].rank(method='first', ascending=False,
+                                                     na_option='bottom')
+    order = universe_rows[np.argsort(_newest.to_numpy())]
+    tools = jobs.load_tools()
+    return {
+        'jobs_df': jobs_df,
+        'index': index,
+        'masks': jobs.load_masks(),
+        'tools': tools,
+        'tool_options': tools.counts().head(N_TOOLS).index.tolist(),
+        'universe_rows': universe_rows,
+        'frame_rows': frame_rows,
+        'order': order[order >= 0],
+    }
+
+
+def _tool_mask(tools: tuple[str, ...], explorer: dict) -> Mask:
+    """Jobs listing any of `tools`, as a Mask over the index universe"""
+    universe_rows = explorer['universe_rows']
+    tool_rows = explorer['tools'].isin(tools) & (universe_rows >= 0)
+    rows = np.zeros(len(explorer['index'].universe), dtype=bool)
+    rows[universe_rows[tool_rows]] = True
+    return Mask.from_rows(rows, explorer['index'].universe)
+
+
+def _keyword_mask(keywords: tuple[str, ...], explorer: dict) -> Mask:
+    """`cmask` semantics: any keyword in MASK_COLS, from the index when every keyword is plain"""
+    index = explorer['index']
+    if all(is_plain(keyword) and keyword == keyword.lower() for keyword in keywords):
+        return index.mask(index.any_of(keywords, jobs.MASK_COLS))
+    _mask = jobs.cmask(list(keywords))
+    return Mask.from_series(_mask, jobs.load_jobs(clean=False, slim=True)['_hash'], index.universe)
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def filter_rows(query: str, keywords: tuple[str, ...], tools: tuple[str, ...],
+                norcal: bool | None, health: bool | None) -> np.ndarray:
+    """Index rows matching every filter, newest first"""
+    explorer = load_explorer()
+    index, masks = explorer['index'], explorer['masks']
+    mask = Mask.from_rows(np.ones(len(index.universe), dtype=bool), index.universe)
+    if query:
+        mask = mask & jobs.bmask(query)
+    if keywords:
+        mask = mask & _keyword_mask(keywords, explorer)
+    if tools:
+        mask = mask & _tool_mask(tools, explorer)
+    for name, flag in (('norcal', norcal), ('health', health)):
+        if flag is not None:
+            mask = mask & (masks[name] if flag else ~masks[name])
+    order = explorer['order']
+    return order[mask.rows()[order]]
+
+
+def page_frame(rows: np.ndarray, explorer: dict):
+    """SHOW_COLS (and a job link) of the given index rows"""
+    page_df = explorer['jobs_df'].iloc[explorer['frame_rows'][rows]]
+    return page_df[SHOW_COLS].assign(url=VIEW_JOB_HTTPS + page_df['_hash'])
+
+
+def main():
+    t0 = time.perf_counter()
+    st.set_page_config(page_title='Job search', layout='wide')
+    explorer = load_explorer()
+
+    with st.sidebar:
+        query = st.text_input('Query', help='python AND (dbt OR airflow) AND NOT "data entry"')
+        _keywords = st.text_input('Any keyword', help='Comma separated, e.g. pytorch, jax')
+        keywords = tuple(k.strip() for k in _keywords.split(',') if k.strip())
+        tools = tuple(st.multiselect('Technical tools (any)', explorer['tool_options']))
+        norcal = FLAGS[st.radio('NorCal', FLAGS, horizontal=True)]
+        health = FLAGS[st.radio('Healthcare', FLAGS, horizontal=True)]
+
+    try:
+        rows = filter_rows(query.strip(), keywords, tools, norcal, health)
+    except (ValueError, KeyError) as e:
+        st.error(f'Invalid query: {e}')
+        return
+
+    filters = (query, keywords, tools, norcal, health)
+    if st.session_state.get('filters') != filters:
+        st.session_state['filters'] = filters
+        st.session_state['page'] = 1
+    n_pages = max(1, -(-len(rows) // PAGE_SIZE))
+    page = st.number_input(f'Page (of {n_pages:,})', min_value=1, max_value=n_pages, key='page')
+    page_rows = rows[(page - 1) * PAGE_SIZE : page * PAGE_SIZE]
+
+    st.dataframe(
+        page_frame(page_rows, explorer),
+        hide_index=True,
+        column_config={'url': st.column_config.LinkColumn('url', display_text='view')},
+    )
+    st.caption(f'{len(rows):,} of {len(explorer["order"]):,} jobs · '
+               f'{1000 * (time.perf_counter() - t0):.0f} ms')
+
+    if len(page_rows):
+        _page_df = explorer['jobs_df'].iloc[explorer['frame_rows'][page_rows]]
+        _titles = _page_df['position'].tolist()
+        i = st.selectbox('Job', range(len(_page_df)), format_func=_titles.__getitem__)
+        job = _page_df.iloc[i]
+        _tools = job['technical_tools']
+        _tools = list(_tools) if isinstance(_tools, (list, np.ndarray)) else []
+        # scraped markdown may hold raw HTML: escape it (and the tools matched against it) so
+        # only the highlight tags are rendered
+        _tools = [escape(tool) for tool in [*tools, *_tools] if isinstance(tool, str)]
+        _md = escape(job['_md'] if isinstance(job['_md'], str) else '')
+        st.markdown(highlight(_md, _tools), unsafe_allow_html=True)
 
 
-@st.cache_data
-def load_data():
-    return jobs
\ No newline at end of file
+main()
@@ -0,0 +1,444 @@
+"""
+Offline benchmarks
+
+Usage:
+>>> from job_search.bench import bench_fetch
+>>> bench_fetch(workers=8, latency=(0.2, 0.6))
+>>> bench_feature_engineering(n=20)
+>>> bench_load_jobs()
+>>> bench_llm(concurrency=(1, 4, 8))
+>>> bench_resumes()
+>>> bench_import("job_search.jobs", check=True)  # `make importtime`
+"""
+
+from pathlib import Path
+import time
+
+IMPORT_BUDGET_MS = 1000
+# Optional extras (scraping, LLM, notebook display, docx) that core modules must not import eagerly
+HEAVY_MODULES = ("duckdb", "IPython", "lmstudio", "docx", "markdownify", "botasaurus", "selenium",
+                 "lxml", "tqdm", "job_search.ai", "job_search.dataset", "job_search.resume")
+
+
+def bench_fetch(directory: Path | None = None, n=200, workers=8, per_host=8, latency=(0.2, 0.6)):
+    """Pages per second of `fetch_many` against the local stand-in server vs a serial loop
+
+    Pages come from the job store (or `directory`); `latency` simulates the real site.
+    """
+    from job_search.fetch import fetch_many, serve_pages, urllib_get
+    from job_search.store import stored_hashes
+
+    server, base_url = serve_pages(directory, latency=latency)
+    try:
+        if directory is None:
+            hashes = sorted(stored_hashes(field="html"))[:n]
+        else:
+            _paths = sorted(Path(directory).glob("*.html"))[:n]
+            hashes = [p.stem.rsplit(".", 1)[-1] for p in _paths]
+        urls = [base_url + hash for hash in hashes]
+
+        t0 = time.perf_counter()
+        for url in urls[: max(1, len(urls) // workers)]:
+            urllib_get(url)
+        serial_s = (time.perf_counter() - t0) / max(1, len(urls) // workers)
+
+        t0 = time.perf_counter()
+        n_bytes = sum(len(html) for _, html in fetch_many(urls, urllib_get, workers, per_host))
+        elapsed = time.perf_counter() - t0
+
+        results = {
+            "pages": len(urls),
+            "serial_pages_per_s": 1 / serial_s,
+            "pages_per_s": len(urls) / elapsed,
+            "MB": n_bytes / 1e6,
+        }
+    finally:
+        server.shutdown()
+    print(" | ".join(f"{k}: {v:,.2f}" for k, v in results.items()))
+    return results
+
+
+def _legacy_card_rows(tree) -> list[list]:
+    """Card extraction as done before the single-pass parser (baseline for bench_load_jdf)"""
+    import re
+
+    _CLASS = "//div[@class='relative bg-white rounded-xl border border-gray-200 shadow hover:border-gray-500 md:hover:border-gray-200']"
+    all_cards = tree.xpath(_CLASS)
+    rows = []
+    for card in all_cards:
+        raw_texts = [x.strip() for x in card.xpath(".//span/text()")]
+        if not re.match(r"\d\d?[y|mo|w|d|h]", raw_texts[0]):
+            raw_texts.insert(0, "0h")
+        if not raw_texts[3].endswith(("yr", "mo", "wk", "hr")):
+            raw_texts.insert(3, "-")
+        if raw_texts[7].startswith(":"):
+            raw_texts.insert(7, "-")
+        if not raw_texts[9].endswith("YOE"):
+            raw_texts.insert(9, "-")
+        if not raw_texts[10].endswith("Mgmt"):
+            raw_texts.insert(10, "-")
+        if "Posting" in raw_texts[12]:
+            raw_texts.insert(12, "-")
+        hash = card.xpath("div[2]/div/a[1]/@href")[0].split("/")[-1]
+        url2 = card.xpath("div[2]/div/a[2]/@href")[0]
+        chash = url2.removeprefix("/?company=").split("&", maxsplit=1)[0]
+        rows.append([*raw_texts[:15], hash, chash])
+    _buttons = ".//div[@class='flex justify-center space-x-2']/div"
+    _lens = [len(card.xpath(_buttons)) for card in all_cards]
+    return rows, _lens
+
+
+def bench_load_jdf(paths=None, n=3, repeat=3):
+    """Cards per second of the single-pass card parser vs the per-card XPath loop
+
+    Runs on the `n` largest saved snapshots under P_PROCESSED (or `paths`). Feature
+    engineering is excluded so only card extraction is compared.
+    """
+    import lxml.html
+    import pandas as pd
+
+    from job_search import dataset
+    from job_search.config import P_PROCESSED
+
+    if paths is None:
+        paths = sorted(P_PROCESSED.rglob("*.html"), key=lambda p: p.stat().st_size)[-n:]
+    html_list = [Path(path).read_text(encoding="utf-8") for path in paths]
+
+    def _legacy(html):
+        rows, _lens = _legacy_card_rows(lxml.html.fromstring(html))
+        return pd.DataFrame(rows).replace(r"\s+", " ", regex=True).assign(_len=_lens)
+
+    _feature_engineering = dataset._feature_engineering
+    dataset._feature_engineering = lambda df: df
+    try:
+        timings = {}
+        for name, parse in [("legacy", _legacy), ("single_pass", dataset.load_jdf.__wrapped__)]:
+            best = float("inf")
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                n_cards = sum(len(parse(html)) for html in html_list)
+                best = min(best, time.perf_counter() - t0)
+            timings[name] = best
+    finally:
+        dataset._feature_engineering = _feature_engineering
+
+    results = {
+        "files": len(html_list),
+        "cards": n_cards,
+        "MB": sum(len(html) for html in html_list) / 1e6,
+        **{f"{name}_cards_per_s": n_cards / t for name, t in timings.items()},
+        "speedup": timings["legacy"] / timings["single_pass"],
+    }
+    print(" | ".join(f"{k}: {v:,.2f}" for k, v in results.items()))
+    return results
+
+
+def _legacy_feature_engineering(df):
+    """`_feature_engineering` as done before vectorization (baseline for bench_feature_engineering)"""
+    import pandas as pd
+
+    from job_search.config import P_DATA
+
+    def load_cities() -> pd.DataFrame:
+        SILICON_VALLEY = "Silicon Valley"
+        cities = pd.read_csv(P_DATA / "raw/cities.csv")[SILICON_VALLEY]
+        bay_cities = cities[~cities.str.startswith("#")].reset_index(drop=True)
+        return bay_cities
+
+    df["hours"] = df["days"].str.split(r"\D").str[0].astype(int) * df["days"].str.split(r"\d").str[
+        -1
+    ].map({"h": 1, "d": 24, "w": 24 * 7, "mo": 730, "y": 24 * 365})
+    df["position"] = (
+        (df["company"].fillna('') + " - " + df["title"])
+        .str.replace(r"[/|:\\*?]", "_", regex=True)
+        .str.replace('"', "'")
+        .str.replace("’", "'")
+        .str.replace(r" +", " ", regex=True)
+        .str.strip()
+    )
+    df["_position"] = df["position"].str.lower()
+    df = (
+        df.sort_values(["position", "hours", "company_summary"])
+        .drop_duplicates(subset="_position")
+        .reset_index(drop=True)
+    )
+    df["location"] = (
+        df["location"].str.replace(", California", "").str.replace(", United States", "")
+    )
+    _salary_type = df["salary"].str.split("/").str[1]
+    _multiplier = (
+        (_salary_type == "yr") + 12 * (_salary_type == "mo") + 2.080 * (_salary_type == "hr")
+    )
+    _salary_range = df["salary"].str.split("/").str[0].str.split("-")
+    df["lower"] = (
+        _salary_range.str[0].str[1:-1].replace("", None).pipe(pd.to_numeric, errors="coerce")
+        * _multiplier
+    )
+    df["upper"] = (
+        _salary_range.str[-1].str[1:-1].replace("", None).pipe(pd.to_numeric, errors="coerce")
+        * _multiplier
+    )
+    df["median"] = (df["lower"] + df["upper"]) / 2
+    df["yoe"] = df["yoe"].str.split("+").str[0].pipe(pd.to_numeric, errors="coerce")
+    df["mgmt"] = df["mgmt"].str.split("+").str[0].pipe(pd.to_numeric, errors="coerce")
+
+    bay_cities = load_cities()
+    regex_bay_cities = f"({'|'.join(bay_cities)})"
+    df["bay"] = df["location"].str.extractall(regex_bay_cities).groupby(level=0)[0].apply(tuple)
+    return df
+
+
+def bench_feature_engineering(paths=None, n=20, repeat=3):
+    """Rows per second and memory of `_feature_engineering` vs the legacy version
+
+    Runs on the raw cards of the `n` most recent snapshots under P_PROCESSED (or `paths`)
+    combined into one frame.
+    """
+    import pandas as pd
+
+    from job_search import dataset
+    from job_search.config import P_PROCESSED
+
+    if paths is None:
+        paths = sorted(P_PROCESSED.glob("*/*/*.html"))[-n:]
+    _feature_engineering = dataset._feature_engineering
+    dataset._feature_engineering = lambda df: df
+    try:
+        raw_df = pd.concat([dataset.load_jdf.__wrapped__(path) for path in paths], ignore_index=True)
+    finally:
+        dataset._feature_engineering = _feature_engineering
+
+    timings, memory = {}, {}
+    for name, engineer in [("legacy", _legacy_feature_engineering), ("vectorized", _feature_engineering)]:
+        best = float("inf")
+        for _ in range(repeat):
+            _df = raw_df.copy()
+            t0 = time.perf_counter()
+            out_df = engineer(_df)
+            best = min(best, time.perf_counter() - t0)
+        timings[name] = best
+        memory[name] = out_df.memory_usage(deep=True).sum() / 1e6
+
+    results = {
+        "files": len(paths),
+        "rows": len(raw_df),
+        **{f"{name}_rows_per_s": len(raw_df) / t for name, t in timings.items()},
+        "speedup": timings["legacy"] / timings["vectorized"],
+        **{f"{name}_MB": mb for name, mb in memory.items()},
+    }
+    print(" | ".join(f"{k}: {v:,.2f}" for k, v in results.items()))
+    return results
+
+
+def _load_jobs_memory(db: str, slim: bool) -> dict:
+    import psutil
+
+    from job_search import jobs
+
+    process = psutil.Process()
+    rss0 = process.memory_info().rss
+    t0 = time.perf_counter()
+    jobs_df = jobs.load_jobs(db, slim=slim)
+    frames = [jobs_df, jobs.load_jobs2026(db, slim=slim), jobs.load_jobs_feb(db, slim=slim)]
+    return {
+        "jobs": len(jobs_df),
+        "s": time.perf_counter() - t0,
+        "RSS_MB": (process.memory_info().rss - rss0) / 1e6,
+        "frames_MB": sum(df.memory_usage(deep=True).sum() for df in frames) / 1e6,
+    }
+
+
+def bench_load_jobs(db="jobs.duckdb"):
+    """Resident memory of `load_jobs` plus its 2026/Feb frames, default vs slim
+
+    Each mode runs in its own worker process so RSS deltas are not shared.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    results = {}
+    for slim in (False, True):
+        with ProcessPoolExecutor(1) as executor:
+            _results = executor.submit(_load_jobs_memory, db, slim).result()
+        results.update({f"{'slim' if slim else 'default'}_{k}": v for k, v in _results.items()})
+    print(" | ".join(f"{k}: {v:,.2f}" for k, v in results.items()))
+    return results
+
+
+def bench_llm(n=64, concurrency=(1, 4, 8), latency=(0.2, 0.4), slots=8):
+    """Jobs per second of `llm_extract_many` against the mock LLM server by concurrency
+
+    Uses synthetic job texts and a throwaway response cache; a second pass at the highest
+    concurrency checks that cached jobs are skipped.
+    """
+    import tempfile
+
+    from job_search.ai import llm_extract_many, serve_mock_llm
+
+    texts = {f"job{i:05d}": f"# Job {i}\n\n" + "Requirements: Python, SQL. " * 50 for i in range(n)}
+    server, base_url = serve_mock_llm(latency=latency, slots=slots)
+    results = {"jobs": n}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for workers in concurrency:
+                path = Path(tmp) / f"llm_{workers}.sqlite"
+                t0 = time.perf_counter()
+                llm_extract_many(texts, concurrency=workers, texts=texts, base_url=base_url, path=path)
+                results[f"c{workers}_jobs_per_s"] = n / (time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            llm_extract_many(texts, concurrency=workers, texts=texts, base_url=base_url, path=path)
+            results["cached_jobs_per_s"] = n / (time.perf_counter() - t0)
+    finally:
+        server.shutdown()
+    print(" | ".join(f"{k}: {v:,.2f}" for k, v in results.items()))
+    return results
+
+
+def _legacy_analyze(path_md, explode=True):
+    import pandas as pd
+
+    from job_search.resume import MarkdownIt, front_matter_plugin
+
+    _md = MarkdownIt('commonmark', {'breaks': True, 'html': True}).use(front_matter_plugin)
+    with open(path_md, encoding='utf-8') as f:
+        _md_lines = f.readlines()
+        _md_text = ''.join([line for line in _md_lines if not line.startswith("<!--")])
+        tokens = _md.parse(_md_text)
+
+    tdf = pd.DataFrame(tokens)
+    tdf['_begin'] = tdf['map'].ffill().str[0]
+    mdf = tdf.groupby('_begin').agg(
+        _len=('_begin', len),
+        _tag=('tag', 'last'),
+        markup=('markup', 'first'),
+        content=('content', ''.join),
+    ).reset_index()
+    mdf['_ul_next'] = mdf['_tag'].shift(-1).isin(['ul', 'li'])
+
+    _md_suffix_newline = mdf['_tag'].isin(['li']).map({False: '\n', True: ''})
+    _markdown_line = (mdf['markup'] + ' ' + mdf['content']).str.lstrip() + _md_suffix_newline
+    mdf['_markdown'] = _markdown_line.str.split('\n')
+    _suffix_newline = (mdf['_tag'].isin(['li', 'h2']) | mdf['_ul_next']).map({False: '\n', True: ''})
+    _condensed_line = mdf['content'] + _suffix_newline
+    mdf['_condensed'] = _condensed_line.str.split('\n')
+
+    if explode:
+        md_df = mdf.explode('_markdown').drop(columns='content').reset_index(drop=True)
+        md_df['_line'] = 1 + md_df['_begin'] + md_df.groupby('_begin').cumcount()
+        md_df['_i'] = md_df.groupby('_begin').cumcount()
+        md_df['_condensed'] = md_df.apply(lambda x: x['_condensed'][x['_i']] if x['_i'] < len(x['_condensed']) else None, axis=1)
+        return md_df
+    return mdf
+
+
+def _legacy_new_document(header=True):
+    import docx
+
+    from job_search.resume import _init_document
+
+    document = docx.Document()
+    _init_document(document, header=header)
+    return document
+
+
+def bench_resumes(paths=None, repeat=5, pdf=None):
+    """Seconds per batch to turn markdown resumes into DOCX (and PDF): legacy per-file vs batched
+
+    Legacy builds each document from scratch (fresh `docx.Document()` + `_init_document`,
+    row-wise `analyze`, paragraph styles resolved by name) and starts LibreOffice once per
+    file; batched reuses the cached base document and converts every file in one LibreOffice
+    call. Both parse every file on every pass (`batch_cached_docx_s` reuses parses). PDF
+    timings run only when `swriter` is on PATH (default for `pdf=None`).
+    """
+    import shutil
+    import tempfile
+
+    from job_search import resume
+    from job_search.config import P_INTERIM
+
+    paths = [Path(p) for p in (paths or sorted(P_INTERIM.glob("*.md")))]
+    pdf = shutil.which("swriter") is not None if pdf is None else pdf
+    results = {"files": len(paths)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        _analyze, _new_document, _add_paragraph = resume.analyze, resume._new_document, resume._add_paragraph
+        resume.analyze = _legacy_analyze
+        resume._new_document = _legacy_new_document
+        resume._add_paragraph = lambda document, runs, style, style_id=None: _add_paragraph(document, runs, style)
+        try:
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                for P_md in paths:
+                    resume.build_document(P_md, resume=True).save(tmp / f"{P_md.stem}.docx")
+            results["legacy_docx_s"] = (time.perf_counter() - t0) / repeat
+        finally:
+            resume.analyze, resume._new_document, resume._add_paragraph = _analyze, _new_document, _add_paragraph
+
+        resume.build_document(paths[0], resume=True)  # warm the base document
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            resume._analyze.cache_clear()
+            for P_md in paths:
+                resume.build_document(P_md, resume=True).save(tmp / f"{P_md.stem}.docx")
+        results["batch_docx_s"] = (time.perf_counter() - t0) / repeat
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for P_md in paths:
+                resume.build_document(P_md, resume=True).save(tmp / f"{P_md.stem}.docx")
+        results["batch_cached_docx_s"] = (time.perf_counter() - t0) / repeat
+
+        if pdf:
+            P_docx_list = [tmp / f"{P_md.stem}.docx" for P_md in paths]
+            t0 = time.perf_counter()
+            for P_docx in P_docx_list:
+                resume.convert_pdfs([P_docx], outdir=tmp)
+            results["legacy_pdf_s"] = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            resume.convert_pdfs(P_docx_list, outdir=tmp)
+            results["batch_pdf_s"] = time.perf_counter() - t0
+    print(" | ".join(f"{k}: {v:,.2f}" for k, v in results.items()))
+    return results
+
+
+def bench_import(modules=("job_search.jobs", "job_search.index", "job_search.embed"),
+                 budget_ms=IMPORT_BUDGET_MS, heavy=HEAVY_MODULES, check=False):
+    """Cold import time of each module (`python -X importtime`, fresh interpreter) and the
+    optional heavy modules it pulls in
+
+    With `check`, raise if a module exceeds `budget_ms` or imports any of `heavy`.
+    """
+    import subprocess
+    import sys
+
+    results = {}
+    failures = []
+    for module in modules:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, cwd=Path(__file__).parents[1],
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+        imported, total_us = set(), 0
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+                continue
+            _, cumulative, name = line.split("|")
+            _name = name.strip()
+            imported.add(_name)
+            # top-level entries: the module and its parent packages
+            if not name.startswith("  ") and (module == _name or module.startswith(_name + ".")):
+                total_us += int(cumulative)
+        _heavy = sorted(h for h in heavy if h in imported)
+        results[f"{module}_ms"] = total_us / 1000
+        if total_us / 1000 > budget_ms:
+            failures.append(f"{module}: {total_us / 1000:,.0f} ms > {budget_ms:,} ms budget")
+        if _heavy:
+            failures.append(f"{module} imports {', '.join(_heavy)}")
+    print(" | ".join(f"{k}: {v:,.2f}" for k, v in results.items()))
+    for failure in failures:
+        print(failure)
+    if check and failures:
+        raise RuntimeError("; ".join(failures))
+    return results
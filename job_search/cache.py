@@ -0,0 +1,198 @@
+"""
+Bounded, persistent HTTP response cache
+
+Replaces `functools.cache` on `requests_get`/`selenium_get`: responses are kept in an
+in-memory LRU bounded by total bytes, expire after a TTL, and spill to an SQLite file so
+re-runs are served without hitting the network. The spill file drops expired rows when opened
+and its oldest rows once it outgrows `max_disk_bytes`.
+
+Usage:
+>>> @response_cache(ResponseCache(max_bytes=2**28, ttl=24 * 3600))
+... def requests_get(url, proxy=False): ...
+>>> requests_get(url, force_refresh=True)
+>>> requests_get.cache.stats()
+"""
+
+from collections import OrderedDict
+from functools import wraps
+from pathlib import Path
+import sqlite3
+import threading
+import time
+import zlib
+
+from job_search.config import P_HTTP_CACHE
+
+MAX_BYTES = 256 * 2**20
+MAX_DISK_BYTES = 2**30
+TTL = 24 * 3600
+
+
+class ResponseCache:
+    """LRU of url -> response text bounded by `max_bytes`, with a TTL and an SQLite spill file
+
+    Args:
+        max_bytes (int): memory budget for cached responses (UTF-8 bytes)
+        ttl (float): seconds a response stays fresh (None never expires)
+        path (Path, optional): spill file; None keeps the cache in memory only
+        max_disk_bytes (int): budget for the compressed responses in the spill file
+    """
+
+    def __init__(
+        self,
+        max_bytes=MAX_BYTES,
+        ttl=TTL,
+        path: Path | None = P_HTTP_CACHE,
+        max_disk_bytes=MAX_DISK_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path = path
+        self.max_disk_bytes = max_disk_bytes
+        self.n_bytes = self.disk_bytes = 0
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+        self._items: OrderedDict[str, tuple[float, str, int]] = OrderedDict()
+        self._lock = threading.RLock()
+        self._con = None
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self.path is None:
+            return None
+        if self._con is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._con = sqlite3.connect(self.path, check_same_thread=False)
+            self._con.execute("PRAGMA journal_mode=WAL")
+            self._con.execute(
+                "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, time REAL, body BLOB)"
+            )
+            self._con.execute("CREATE INDEX IF NOT EXISTS responses_time ON responses (time)")
+            self._prune()
+        return self._con
+
+    def _prune(self):
+        """Delete expired rows, then the oldest rows beyond `max_disk_bytes`"""
+        with self._con:
+            if self.ttl is not None:
+                _expired = time.time() - self.ttl
+                self._con.execute("DELETE FROM responses WHERE time < ?", (_expired,))
+            self._con.execute(
+                """
+                DELETE FROM responses WHERE url IN (
+                    SELECT url FROM (
+                        SELECT url, SUM(length(body)) OVER (ORDER BY time DESC) AS total
+                        FROM responses
+                    ) WHERE total > ?
+                )
+                """,
+                (self.max_disk_bytes,),
+            )
+        (total,) = self._con.execute("SELECT SUM(length(body)) FROM responses").fetchone()
+        self.disk_bytes = total or 0
+
+    def _fresh(self, stored: float) -> bool:
+        return self.ttl is None or (time.time() - stored) < self.ttl
+
+    def get(self, url: str) -> str | None:
+        with self._lock:
+            if url in self._items:
+                stored, text, _ = self._items[url]
+                if self._fresh(stored):
+                    self._items.move_to_end(url)
+                    self.hits += 1
+                    return text
+                self._pop(url)
+            con = self._connect()
+            row = None
+            if con is not None:
+                row = con.execute(
+                    "SELECT time, body FROM responses WHERE url = ?", (url,)
+                ).fetchone()
+            if row is not None and self._fresh(row[0]):
+                text = zlib.decompress(row[1]).decode()
+                self._insert(url, row[0], text)
+                self.disk_hits += 1
+                return text
+            self.misses += 1
+            return None
+
+    def set(self, url: str, text: str):
+        stored = time.time()
+        with self._lock:
+            self._insert(url, stored, text)
+            con = self._connect()
+            if con is not None:
+                body = zlib.compress(text.encode(), 6)
+                with con:
+                    con.execute(
+                        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (url, stored, body)
+                    )
+                # counts replaced rows twice until the next prune recounts
+                self.disk_bytes += len(body)
+                if self.disk_bytes > self.max_disk_bytes:
+                    self._prune()
+
+    def _insert(self, url: str, stored: float, text: str):
+        if url in self._items:
+            self._pop(url)
+        size = len(text.encode())
+        self._items[url] = (stored, text, size)
+        self.n_bytes += size
+        while self.n_bytes > self.max_bytes and len(self._items) > 1:
+            oldest = next(iter(self._items))
+            self._pop(oldest)
+            self.evictions += 1
+
+    def _pop(self, url: str):
+        _, _, size = self._items.pop(url)
+        self.n_bytes -= size
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._items.clear()
+            self.n_bytes = 0
+            con = self._connect()
+            if disk and con is not None:
+                with con:
+                    con.execute("DELETE FROM responses")
+                self.disk_bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "entries": len(self._items),
+            "MB": self.n_bytes / 1e6,
+            "disk_MB": self.disk_bytes / 1e6,
+        }
+
+
+def response_cache(cache: ResponseCache | None = None, valid=bool):
+    """Cache a `get(url, ...)` function's responses by url
+
+    The wrapped function accepts `force_refresh=True` to bypass (and refresh) the cache and
+    exposes its cache as `.cache`. Only responses passing `valid` are cached. Keys are
+    prefixed with the function name so getters can share one `ResponseCache`.
+    """
+    _cache = ResponseCache() if cache is None else cache
+
+    def decorator(get):
+        @wraps(get)
+        def wrapper(url, *args, force_refresh=False, **kwargs):
+            key = f"{get.__name__} {url}"
+            if not force_refresh:
+                text = _cache.get(key)
+                if text is not None:
+                    return text
+            text = get(url, *args, **kwargs)
+            if valid(text):
+                _cache.set(key, text)
+            return text
+
+        wrapper.cache = _cache
+        return wrapper
+
+    return decorator
@@ -1,20 +1,247 @@
+"""
+Command line entry points for the crawl -> fetch -> ingest -> index -> search pipeline
+
+Heavy modules are imported inside each command, so `--help` starts instantly. Every
+command ends with one line of throughput stats (or a JSON object with `--json`) for cron logs.
+
+Usage:
+$ job_search crawl DS_NorCal DS_Healthcare --workers 8 --bare --proxy
+$ job_search fetch --since 2026-02-01 --workers 8
+$ job_search ingest --workers 4 --since 2026-01-01
+$ job_search index --embed --since 2026-01-01
+$ job_search search 'python AND norcal AND NOT health' --since 2026-02-01
+$ job_search render 'python AND (dbt OR airflow)' --limit 50
+"""
+
+import json
+from pathlib import Path
+import time
+from typing import Annotated
+
 import typer
 
-app = typer.Typer()
+app = typer.Typer(no_args_is_help=True)
+
+Workers = Annotated[int, typer.Option(help="Parallel workers (browsers, threads or processes)")]
+Since = Annotated[str | None, typer.Option(help="Only dates on or after YYYY-MM-DD")]
+Queries = Annotated[list[str] | None, typer.Argument(help="Query names (default QUERY_LIST)")]
+Json = Annotated[bool, typer.Option("--json", help="Print stats as one JSON object")]
+
+
+def _report(stats: dict, t0: float, as_json=False):
+    """Print `stats` plus elapsed seconds and per-second rates of `cards`, `jobs` and `bytes`"""
+    stats["seconds"] = time.perf_counter() - t0
+    for key in ("cards", "jobs", "bytes"):
+        if key in stats:
+            stats[f"{key}_per_s"] = stats[key] / stats["seconds"] if stats["seconds"] else 0.0
+    if as_json:
+        print(json.dumps(stats, default=str))
+    else:
+        print(" | ".join(f"{k}: {v:,.2f}" if isinstance(v, float) else f"{k}: {v:,}"
+                         for k, v in stats.items()))
+
+
+def _http_cache_stats(stats: dict) -> dict:
+    from job_search.dataset import HTTP_CACHE
+
+    _cache = HTTP_CACHE.stats()
+    stats["cache_hits"] = _cache["hits"] + _cache["disk_hits"]
+    stats["cache_hit_rate"] = _cache["hit_rate"]
+    return stats
+
+
+def _since_mask(dates, since: str):
+    import pandas as pd
+
+    _since = pd.Timestamp(since)
+    if getattr(dates.dt, "tz", None) is not None:
+        _since = _since.tz_localize(dates.dt.tz)
+    return (dates >= _since).fillna(False).astype(bool)
+
+
+def _snapshots(queries: list[str], since: str | None) -> list[Path]:
+    """`{date}/{query}/{query}.html` snapshots under P_PROCESSED, today's when no `since`"""
+    from job_search.config import P_PROCESSED, QUERY_LIST
+    from job_search.utils import now
+
+    since = since or now(time=False)
+    P_save_list = []
+    for query in queries or QUERY_LIST:
+        for P_save in sorted(P_PROCESSED.glob(f"*/{query}/{query}.html")):
+            if P_save.parents[1].name >= since:
+                P_save_list.append(P_save)
+    return P_save_list
 
 
 @app.command()
-def hello(name: str):
-    print(f"Hello {name}")
+def crawl(
+    queries: Queries = None,
+    workers: Workers = 4,
+    scroll_workers: Annotated[int, typer.Option(help="Parallel browsers scrolling queries")] = 3,
+    mode: Annotated[str, typer.Option(help="tiered, requests or selenium")] = "tiered",
+    bare: bool = False,
+    proxy: bool = False,
+    overwrite: bool = False,
+    full: Annotated[bool, typer.Option(help="Fetch every card, not only the delta")] = False,
+    as_json: Json = False,
+):
+    """Scroll queries into today's snapshots and fetch their new jobs once"""
+    from job_search.config import QUERY_LIST
+    from job_search.crawl import crawl as _crawl
+
+    t0, stats = time.perf_counter(), {}
+    _crawl(queries or QUERY_LIST, workers=workers, scroll_workers=scroll_workers,
+           overwrite=overwrite, bare=bare, proxy=proxy, mode=mode, incremental=not full,
+           stats=stats)
+    _report(_http_cache_stats(stats), t0, as_json)
 
 
 @app.command()
-def goodbye(name: str, formal: bool = False):
-    if formal:
-        print(f"Goodbye Ms. {name}. Have a good day.")
-    else:
-        print(f"Bye {name}!")
+def fetch(
+    queries: Queries = None,
+    workers: Workers = 4,
+    since: Since = None,
+    mode: Annotated[str, typer.Option(help="tiered, requests or selenium")] = "tiered",
+    proxy: bool = False,
+    full: Annotated[bool, typer.Option(help="Fetch every card, not only the delta")] = False,
+    as_json: Json = False,
+):
+    """Fetch job pages for existing snapshots (today's unless `--since`)"""
+    from job_search.dataset import main1
+
+    t0, stats = time.perf_counter(), {}
+    P_save_list = _snapshots(queries, since)
+    if not P_save_list:
+        print("No snapshots to fetch")
+    for P_save in P_save_list:
+        main1(P_save, proxy=proxy, workers=workers, mode=mode, incremental=not full, stats=stats)
+    stats["snapshots"] = len(P_save_list)
+    _report(_http_cache_stats(stats), t0, as_json)
+
+
+@app.command()
+def ingest(
+    db: str = "jobs.duckdb",
+    workers: Annotated[int | None, typer.Option(help="Processes (default: all CPUs)")] = None,
+    since: Since = None,
+    compact: Annotated[bool, typer.Option(help="Merge appended parquet parts afterwards")] = False,
+    snapshots: Annotated[bool, typer.Option(help="Also parse card snapshots into P_JDF")] = True,
+    force: bool = False,
+    as_json: Json = False,
+):
+    """Sync the DuckDB jobs table to parquet (new or changed rows only) and parse snapshots"""
+    from job_search.jobs import compact_jobs, ingest_snapshots, sync_jobs
+
+    t0, md_stats = time.perf_counter(), {}
+    stats = {"jobs": sync_jobs(db, workers=workers, force=force, stats=md_stats)}
+    if compact:
+        compact_jobs(db)
+    if snapshots:
+        stats["snapshots"] = len(ingest_snapshots(workers=workers, since=since))
+    _lookups = md_stats.get("hits", 0) + md_stats.get("misses", 0)
+    stats["md_cache_hit_rate"] = md_stats.get("hits", 0) / _lookups if _lookups else 0.0
+    _report(stats, t0, as_json)
+
+
+@app.command()
+def index(
+    overwrite: Annotated[bool, typer.Option(help="Rebuild even if up to date")] = False,
+    embed: Annotated[bool, typer.Option(help="Also embed new jobs with LM Studio")] = False,
+    since: Since = None,
+    as_json: Json = False,
+):
+    """Build the keyword index, named masks and tool index (and embeddings with `--embed`)"""
+    from job_search.jobs import load_index, load_jobs, load_masks, load_tools
+
+    t0 = time.perf_counter()
+    _index = load_index(overwrite=overwrite)
+    load_masks(overwrite=overwrite)
+    load_tools()
+    stats = {"jobs": _index.n}
+    stats["terms"] = sum(len(vocab) for vocab, _, _ in _index.postings.values())
+    if embed:
+        from job_search.embed import EmbeddingStore
+
+        jobs_df = load_jobs(slim=True)
+        if since:
+            jobs_df = jobs_df[_since_mask(jobs_df["estimated_publish_date"], since)]
+        stats["embedded"] = EmbeddingStore().update(jobs_df)
+    _report(stats, t0, as_json)
+
+
+def _search(query: str, since: str | None, limit: int):
+    """(matches, matches since `since`, newest `limit` jobs with heavy columns) of a `bmask`
+    query; only the shown jobs read their description and markdown from disk
+    """
+    from job_search.jobs import bmask, get_many, load_jobs
+
+    mask = bmask(query)
+    jobs_df = load_jobs(slim=True)
+    found_df = jobs_df[mask.to_series(jobs_df).to_numpy()]
+    if since:
+        found_df = found_df[_since_mask(found_df["estimated_publish_date"], since)]
+    found_df = found_df.sort_values("estimated_publish_date", ascending=False)
+    return mask.count(), len(found_df), get_many(found_df["_hash"].head(limit), jobs_df)
+
+
+@app.command()
+def search(
+    query: Annotated[str, typer.Argument(help='Boolean query: python AND "data science"')],
+    since: Since = None,
+    limit: int = 20,
+    as_json: Json = False,
+):
+    """Print the newest jobs matching a boolean keyword query"""
+    from job_search.config import VIEW_JOB_HTTPS
+
+    t0 = time.perf_counter()
+    n_matches, n_since, found_df = _search(query, since, limit)
+    for job in found_df.to_dict("records"):
+        _date = str(job["estimated_publish_date"])[:10]
+        print(f"{_date}  {job['company_name']} - {job['title']}  {VIEW_JOB_HTTPS}{job['_hash']}")
+    _report({"matches": n_matches, "since": n_since, "shown": len(found_df)}, t0, as_json)
+
+
+@app.command()
+def render(
+    query: Annotated[str, typer.Argument(help="Boolean query (see `search`)")],
+    since: Since = None,
+    limit: int = 50,
+    out: Annotated[Path | None, typer.Option(help="Default: P_PROCESSED/search.html")] = None,
+    as_json: Json = False,
+):
+    """Render the newest jobs matching a query to an HTML page, tools highlighted"""
+    from html import escape
+
+    from job_search.config import P_PROCESSED, VIEW_JOB_HTTPS
+    from job_search.dataset import render_template
+    from job_search.utils import highlight
+
+    t0 = time.perf_counter()
+    n_matches, n_since, found_df = _search(query, since, limit)
+    cards = []
+    for job in found_df.to_dict("records"):
+        _tools = job["technical_tools"]
+        _tools = [] if isinstance(_tools, str) or not hasattr(_tools, "__iter__") else _tools
+        # tools are matched against the escaped markdown, so escape them the same way
+        _tools = [escape(tool) for tool in _tools if isinstance(tool, str)]
+        _position = escape(f"{job['company_name']} - {job['title']}")
+        _md = highlight(escape(job["_md"] if isinstance(job["_md"], str) else ""), _tools)
+        cards.append(
+            f'<article class="p-4 border-b"><h2 class="text-lg font-bold">'
+            f'<a href="{VIEW_JOB_HTTPS}{job["_hash"]}">{_position}</a></h2>'
+            f'<p class="text-sm">{str(job["estimated_publish_date"])[:10]}</p>'
+            f'<pre class="whitespace-pre-wrap">{_md}</pre></article>'
+        )
+    P_out = out or P_PROCESSED / "search.html"
+    P_out.parent.mkdir(parents=True, exist_ok=True)
+    _title = f"{query} (N={n_since})"
+    _html = render_template(body="\n".join(cards), title=_title, description=query)
+    P_out.write_text(_html, encoding="utf-8")
+    print(f"Saved {P_out}")
+    _report({"matches": n_matches, "since": n_since, "jobs": len(found_df),
+             "bytes": len(_html.encode())}, t0, as_json)
 
 
 if __name__ == "__main__":
-    app()
\ No newline at end of file
+    app()
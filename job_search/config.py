@@ -1,3 +1,4 @@
+from functools import cache
 from pathlib import Path
 
 from job_search.utils import is_running_wsl, now
@@ -15,6 +16,7 @@ P_RESUME = P_RAW / 'AW_Resume.md'
 
 HIRING_CAFE_HTTPS = "https://hiring.cafe"
 VIEW_JOB_HTTPS = "https://hiring.cafe/viewjob/"
+LMS_URL = "http://localhost:1234/v1"  # LM Studio OpenAI-compatible server
 QUERY_LIST: list[str] = [
     DS_NORCAL := 'DS_NorCal',
     DS_HEALTH := 'DS_Healthcare',
@@ -39,18 +41,41 @@ P_DICT = P_CACHE / 'dicts'
 P_JOBS_ = P_CACHE / 'jobs_feb'
 P_URLS_ = P_CACHE / 'urls_feb'
 P_DICT_ = P_CACHE / 'dicts_feb'
+P_STORE = P_CACHE / 'jobs.sqlite'
+P_HTTP_CACHE = P_CACHE / 'http.sqlite'
+P_MD_CACHE = P_CACHE / 'md.sqlite'
+P_LLM_CACHE = P_CACHE / 'llm.sqlite'
+P_JDF = P_CACHE / 'jdf'
+P_EMBED = P_CACHE / 'embed'
 # P_COMPANY_URLS = P_DATA / 'cache/company_urls'
 # P_ALL_COMPANY_URLS = P_CACHE / 'ALL_company_urls'
 
-_date = now(time=False)
-_date_prev = now(time=False, days=1)
 # STEM = 'Healthcare'
 STEM = QUERY_LIST[0] if (len(QUERY_LIST) > 0) else DS_HEALTH
-P_DATE = P_PROCESSED / f'{_date}'
-P_DATE_PREV = P_PROCESSED / f'{_date_prev}'
-P_STEM = P_DATE / f'{STEM}/{STEM}.html'
-P_STEM_PREV = P_DATE_PREV / f'{STEM}/{STEM}.html'
-# P_STEM_JOBS_HTML = P_DATE / f'{STEM}/{STEM}_jobs.html'
-# P_STEM_COMPANY_URLS = P_DATE / f'{STEM}/{STEM}_company_urls/'
-# P_STEM_QUERY_TXT = P_QUERY / f'{STEM}.txt'
-P_stem = P_STEM if P_STEM.exists() else P_STEM_PREV
\ No newline at end of file
+
+
+@cache
+def _dated_paths() -> dict:
+    """Paths under today's P_PROCESSED folder, resolved on first access (see `__getattr__`)"""
+    _date = now(time=False)
+    _date_prev = now(time=False, days=1)
+    P_DATE = P_PROCESSED / f'{_date}'
+    P_DATE_PREV = P_PROCESSED / f'{_date_prev}'
+    P_STEM = P_DATE / f'{STEM}/{STEM}.html'
+    P_STEM_PREV = P_DATE_PREV / f'{STEM}/{STEM}.html'
+    # P_STEM_JOBS_HTML = P_DATE / f'{STEM}/{STEM}_jobs.html'
+    # P_STEM_COMPANY_URLS = P_DATE / f'{STEM}/{STEM}_company_urls/'
+    # P_STEM_QUERY_TXT = P_QUERY / f'{STEM}.txt'
+    P_stem = P_STEM if P_STEM.exists() else P_STEM_PREV
+    return {
+        '_date': _date, '_date_prev': _date_prev, 'P_DATE': P_DATE, 'P_DATE_PREV': P_DATE_PREV,
+        'P_STEM': P_STEM, 'P_STEM_PREV': P_STEM_PREV, 'P_stem': P_stem,
+    }
+
+
+def __getattr__(name):
+    # Keeps `import job_search.config` free of clock reads and filesystem checks
+    try:
+        return _dated_paths()[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
@@ -0,0 +1,83 @@
+"""
+Crawl every query in QUERY_LIST with one shared, deduplicated fetch queue
+
+Usage:
+>>> from job_search.crawl import crawl
+>>> jdf_dict = crawl(QUERY_LIST, workers=4)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from job_search.config import P_QUERY, QUERY_LIST
+from job_search.dataset import _save_dicts, delta_cards, load_jdf, log, main0
+from job_search.store import stored_hashes
+
+
+def crawl(
+    queries=QUERY_LIST,
+    workers=4,
+    scroll_workers=3,
+    overwrite=False,
+    bare=False,
+    proxy=False,
+    mode="tiered",
+    incremental=True,
+    stats=None,
+) -> dict[str, pd.DataFrame]:
+    """Scroll every query in parallel, then fetch each unique job hash once
+
+    1. `main0` runs for each query in up to `scroll_workers` parallel browsers.
+    2. Cards from all queries are merged into one work queue deduplicated by hash (with
+       `incremental`, only cards added or changed since each query's last snapshot, plus
+       unchanged cards still missing from the store).
+    3. The shared queue is fetched once with `_save_dicts`.
+    4. Per-query job lists are rebuilt from the shared store.
+
+    Args:
+        stats (dict, optional): updated with `cards` scrolled and the `_save_dicts` stats
+
+    Returns:
+        dict[str, pd.DataFrame]: cards per query, with a `stored` column
+    """
+    P_query_list = [P_QUERY / f"{query}.txt" for query in queries]
+    _main0 = partial(main0, overwrite=overwrite, bare=bare, proxy=proxy)
+    with ThreadPoolExecutor(max_workers=scroll_workers) as executor:
+        P_save_dict: dict[str, Path] = dict(zip(queries, executor.map(_main0, P_query_list)))
+
+    jdf_dict = {query: load_jdf(P_save) for query, P_save in P_save_dict.items()}
+    todo_list, refresh = [], set()
+    for query, jdf in jdf_dict.items():
+        if incremental:
+            jdf_todo, _refresh = delta_cards(P_save_dict[query], jdf)
+            todo_list.append(jdf_todo)
+            refresh |= _refresh
+        else:
+            todo_list.append(jdf)
+    queue_df = pd.concat(todo_list, ignore_index=True).drop_duplicates(subset="hash")
+    n_cards = sum(len(jdf) for jdf in todo_list)
+    print(f"Crawling {len(queue_df):,} unique jobs from {n_cards:,} cards "
+          f"in {len(queries)} queries")
+    if stats is not None:
+        stats["cards"] = stats.get("cards", 0) + sum(len(jdf) for jdf in jdf_dict.values())
+    _save_dicts(queue_df, proxy=proxy, workers=workers, mode=mode, refresh=refresh, stats=stats)
+
+    return {
+        query: rebuild_query(P_save_dict[query], jdf) for query, jdf in jdf_dict.items()
+    }
+
+
+def rebuild_query(P_save: Path, jdf: pd.DataFrame) -> pd.DataFrame:
+    """Mark which of a query's cards are in the shared store and save its identifier list"""
+    jdf = jdf.assign(stored=jdf["hash"].isin(stored_hashes(jdf["hash"])))
+    P_identifiers = P_save.parent / f"{P_save.stem}_identifiers.txt"
+    (jdf["position"] + "." + jdf["hash"]).to_csv(P_identifiers, index=False, header=None)
+    log(P_save).info(f"Saved {P_identifiers} (N={len(jdf)}, stored={jdf['stored'].sum()})...")
+    return jdf
+
+
+if __name__ == "__main__":
+    crawl(QUERY_LIST, bare=True, proxy=True)
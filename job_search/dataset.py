@@ -3,12 +3,10 @@
 Download job description
 """
 
-from functools import cache
-from itertools import chain
+from functools import cache, partial
 import json
 import logging
 from pathlib import Path
-import pickle
 import random
 import re
 from textwrap import dedent
@@ -19,39 +17,42 @@ from warnings import filterwarnings
 from botasaurus.user_agent import UserAgent
 from botasaurus_requests import request
 import lxml
+from lxml import etree
 import lxml.html
-from markdownify import markdownify as md
+import numpy as np
 
 # from markdown_it import MarkdownIt
 # from mdit_py_plugins.front_matter import front_matter_plugin
 # from mdit_py_plugins.wordcount import wordcount_plugin
-import numpy as np
 import pandas as pd
 from selenium.webdriver.common.by import By
 from tqdm import TqdmExperimentalWarning
 from tqdm.rich import tqdm
 
+from job_search.cache import ResponseCache, response_cache
 from job_search.config import (
     # P_ALL_COMPANY_URLS,
     # P_CACHE,
     P_DATA,
     P_DATE,
-    P_DICT,
-    P_JOBS,
     P_QUERY,
     P_STEM,
     P_STEM_PREV,
-    P_URLS,
     QUERY_LIST,
     VIEW_JOB_HTTPS,
 )
-from job_search.utils import is_running_wsl
+from job_search.fetch import DriverPool, TieredGetter, fetch_many, has_job_data
+from job_search.mdconvert import clean_md, convert_one
+from job_search.store import put_job, stored_hashes
+from job_search.utils import clean_position, is_running_wsl
 
 filterwarnings("ignore", category=TqdmExperimentalWarning)
 
 # Selenium options
 SCROLL_PAUSE_TIME = 0.5
 WAIT_TIME = 10
+# Job pages shared by requests_get and selenium_get (256 MB in memory, 1 day TTL)
+HTTP_CACHE = ResponseCache(max_bytes=256 * 2**20, ttl=24 * 3600)
 
 
 def init_driver(headless=True, proxy=False):
@@ -188,72 +189,224 @@ def main0(path_query: Path, overwrite=False, bare=False, proxy=False) -> Path:
     return P_save
 
 
-def main1(P_save: Path | str, proxy=False):
+def main1(P_save: Path | str, proxy=False, workers=4, mode="tiered", incremental=True, stats=None):
     """
     Scrape job urls and descriptions
+
+    With `incremental`, only cards added or changed since the previous snapshot of the same
+    query are fetched, and the delta is saved next to `P_save` (see `diff_cards`).
+
+    Args:
+        stats (dict, optional): updated with `cards` read and the `_save_dicts` stats
     """
+    P_save = Path(P_save)
     log(P_save).info(f"Scraping initial job descriptions and metadata from {P_save}...")
 
     df = load_jdf(P_save)
-    _save_dicts(df, proxy=proxy)
-
-
-def _save_dicts(df, P_save=None, proxy=False):
-    P_URLS.mkdir(exist_ok=True)
-    P_JOBS.mkdir(exist_ok=True)
-    P_DICT.mkdir(exist_ok=True)
-
+    if stats is not None:
+        stats["cards"] = stats.get("cards", 0) + len(df)
+    refresh = ()
+    if incremental:
+        df, refresh = delta_cards(P_save, df)
+    _save_dicts(df, proxy=proxy, workers=workers, mode=mode, refresh=refresh, stats=stats)
+
+
+def _save_dicts(
+    df,
+    P_save=None,
+    proxy=False,
+    workers=4,
+    per_host=4,
+    delay=(0.2, 0.6),
+    mode="tiered",
+    refresh=(),
+    stats=None,
+):
+    """Fetch and save job pages for every card in `df` not in the job store yet
+
+    Pages are fetched concurrently and saved as they complete. `per_host` and `delay` bound
+    the load on hiring.cafe.
+
+    Args:
+        mode (str): "tiered" tries plain HTTP first and opens a browser only for pages missing
+            the `__NEXT_DATA__` blob, "requests" or "selenium" use a single tier
+        refresh (Iterable[str]): hashes to re-fetch even if stored, bypassing the HTTP cache
+        stats (dict, optional): updated with `jobs` fetched, page `bytes` and pages per tier
+    """
     df_identifier: pd.Series = df["position"] + "." + df["hash"]
     if P_save:
         P_jdf: Path = P_save.parent / f"{P_save.stem}_identifiers.txt"
         df_identifier.to_csv(P_jdf, index=False, header=None)
         log(P_save).info(f"Saved {P_jdf} (N={len(df)})...")
-    hash2identifier_dict = dict(zip(df["hash"], df_identifier))
-
-    driver = init_driver(proxy=False, headless=False)#
-
-    for url in (pbar := tqdm(VIEW_JOB_HTTPS + df["hash"])):
-        hash: str = url.split("/")[-1]
-        identifier = hash2identifier_dict[hash]
-        P_url = P_URLS / f"{identifier}.html"
-        P_md = P_JOBS / f"{identifier}.md"
-        P_dict = P_DICT / f"{identifier}.html.pkl"
-        pbar.set_description(f"{P_url}")
-        # if P_md.exists():
-        if P_dict.exists():
-            continue
-        if not P_dict.exists():
-            # url_get_content = requests_get(url, proxy=proxy)#
-            url_get_content = selenium_get(url, proxy=False, driver=driver)#
-            # time.sleep(random.randint(2,4))
-            time.sleep(random.uniform(1, 3))
-            with open(P_url, "w", encoding="utf-8") as f:
-                f.write(url_get_content)
-
-            root = lxml.html.fromstring(url_get_content)
-            _next_data_list = root.xpath("//script[@id='__NEXT_DATA__']")
-            if len(_next_data_list) == 0:
-                next_data_dict = {}
-            else:
-                _next_data = root.xpath("//script[@id='__NEXT_DATA__']")[0]
-                next_data_dict = json.loads(_next_data.text_content())
-            with open(P_dict, "wb") as f:
-                pickle.dump(next_data_dict, f)
-        else:
-            with open(P_url, encoding="utf-8") as f:
-                url_get_content = f.read()
-            if url_get_content == "":
-                print(P_url)
-                continue
-        root = lxml.html.fromstring(url_get_content)
-        job_description = extract_job_description(root)
-        if len(job_description) == 0:
-            # P_url.unlink()
-            print(P_url)
-            continue
-        else:
-            with open(P_md, "w", encoding="utf-8") as f:
-                f.write(job_description)
+    hash2position_dict = dict(zip(df["hash"], df["position"]))
+    refresh_urls = {VIEW_JOB_HTTPS + hash for hash in refresh}
+    todo_hashes = sorted(
+        (set(hash2position_dict) - stored_hashes(hash2position_dict))
+        | (set(hash2position_dict) & set(refresh))
+    )
+
+    def _requests_get(url):
+        return requests_get(url, proxy=proxy, force_refresh=url in refresh_urls)
+
+    def _selenium_get(url, driver):
+        return selenium_get(url, driver=driver, force_refresh=url in refresh_urls)
+
+    _init = partial(init_driver, proxy=False, headless=False)
+    with DriverPool(workers, init=_init, get=_selenium_get) as pool:
+        tiers = {"requests": _requests_get, "selenium": pool.get}
+        get = TieredGetter(tiers if mode == "tiered" else {mode: tiers[mode]})
+        _pages = fetch_many(
+            [VIEW_JOB_HTTPS + hash for hash in todo_hashes],
+            get,
+            workers=workers,
+            per_host=per_host,
+            delay=delay,
+        )
+        n_bytes = 0
+        for url, url_get_content in (pbar := tqdm(_pages, total=len(todo_hashes))):
+            n_bytes += len(url_get_content.encode())
+            hash: str = url.split("/")[-1]
+            pbar.set_description(f"{hash2position_dict[hash]}.{hash}")
+            pbar.set_postfix(get.counts)
+            _save_job(hash, url_get_content, position=hash2position_dict[hash])
+    print(f"Fetched {len(todo_hashes)} jobs by tier: {dict(get.counts)}")
+    if stats is not None:
+        for key, value in {"jobs": len(todo_hashes), "bytes": n_bytes, **get.counts}.items():
+            stats[key] = stats.get(key, 0) + value
+    return get.counts
+
+
+def _save_job(hash: str, url_get_content: str, position=None):
+    """Parse a fetched job page and save its HTML, `__NEXT_DATA__` dict and markdown"""
+    identifier = f"{position}.{hash}"
+    if url_get_content == "":
+        print(identifier)
+        return
+
+    root = lxml.html.fromstring(url_get_content)
+    _next_data_list = root.xpath("//script[@id='__NEXT_DATA__']")
+    if len(_next_data_list) == 0:
+        # no job data: keep the page for inspection but leave `data` NULL so it is refetched
+        put_job(hash, html=url_get_content, position=position)
+        print(identifier)
+        return
+    next_data_dict = json.loads(_next_data_list[0].text_content())
+    job_description = extract_job_description(root)
+    if len(job_description) == 0:
+        print(identifier)
+    put_job(
+        hash,
+        html=url_get_content,
+        data=next_data_dict,
+        md=job_description or None,
+        position=position,
+    )
+
+
+################################################################################
+# Incremental crawl
+################################################################################
+
+# Card fields that mark a job as changed (excludes the ageing `days`/`hours`)
+DELTA_COLS = [
+    "title",
+    "company",
+    "location",
+    "salary",
+    "onsite",
+    "full_time",
+    "yoe",
+    "mgmt",
+    "job_summary",
+    "skills",
+]
+
+
+def prev_snapshot(P_save: Path) -> Path | None:
+    """Most recent snapshot of the same query dated before `P_save`"""
+    P_save = Path(P_save)
+    _date_dir = P_save.parents[1]
+    _prev = [
+        path
+        for path in _date_dir.parent.glob(f"*/{P_save.parent.name}/{P_save.name}")
+        if path.parents[1].name < _date_dir.name
+    ]
+    return max(_prev, key=lambda path: path.parents[1].name, default=None)
+
+
+def diff_cards(jdf: pd.DataFrame, jdf_prev: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """Compare today's job cards with a previous snapshot by `hash`
+
+    Returns:
+        dict[str, pd.DataFrame]: "added" and "changed" cards from `jdf` and "removed" cards
+            from `jdf_prev`. A card is changed when any of `DELTA_COLS` differs.
+    """
+    jdf = jdf.drop_duplicates(subset="hash")
+    jdf_prev = jdf_prev.drop_duplicates(subset="hash")
+    _cols = [col for col in DELTA_COLS if col in jdf and col in jdf_prev]
+
+    def _fingerprint(df):
+        _values = df[_cols].astype(str)
+        return pd.Series(pd.util.hash_pandas_object(_values, index=False).values, index=df["hash"])
+
+    is_new = ~jdf["hash"].isin(jdf_prev["hash"])
+    is_gone = ~jdf_prev["hash"].isin(jdf["hash"])
+    _kept = jdf.loc[~is_new, "hash"]
+    _fp, _fp_prev = _fingerprint(jdf), _fingerprint(jdf_prev)
+    changed_hashes = _kept[(_fp[_kept].values != _fp_prev[_kept].values)]
+    return {
+        "added": jdf[is_new].reset_index(drop=True),
+        "removed": jdf_prev[is_gone].reset_index(drop=True),
+        "changed": jdf[jdf["hash"].isin(changed_hashes)].reset_index(drop=True),
+    }
+
+
+def save_delta(P_save: Path, delta: dict[str, pd.DataFrame], P_prev: Path | None = None) -> Path:
+    """Write the per-day delta manifest `{stem}_delta.json` next to `P_save`"""
+    P_delta = P_save.parent / f"{P_save.stem}_delta.json"
+    manifest = {
+        "snapshot": str(P_save),
+        "previous": str(P_prev) if P_prev else None,
+        "counts": {k: len(v) for k, v in delta.items()},
+        **{k: v["hash"].tolist() for k, v in delta.items()},
+    }
+    with open(P_delta, "w") as f:
+        json.dump(manifest, f, indent=4)
+    return P_delta
+
+
+def delta_cards(P_save: Path, df: pd.DataFrame) -> tuple[pd.DataFrame, set[str]]:
+    """Diff `df` (cards of `P_save`) with the previous snapshot and save the delta manifest
+
+    Cards missing from the job store are queued too, even if unchanged, so pages that failed
+    or came back empty on an earlier run are retried.
+
+    Returns:
+        (pd.DataFrame, set[str]): added, changed and unstored cards to fetch, and the changed
+            hashes
+    """
+    P_prev = prev_snapshot(P_save)
+    df_prev = load_jdf(P_prev) if P_prev else df.iloc[:0]
+    delta = diff_cards(df, df_prev)
+    save_delta(P_save, delta, P_prev)
+    log(P_save).info(f"Delta vs {P_prev}: { {k: len(v) for k, v in delta.items()} }")
+    df_unstored = df[~df["hash"].isin(stored_hashes(df["hash"]))]
+    df_todo = pd.concat([delta["added"], delta["changed"], df_unstored], ignore_index=True)
+    return df_todo.drop_duplicates(subset="hash", ignore_index=True), set(delta["changed"]["hash"])
+
+
+def load_delta(P_save: Path) -> dict | None:
+    """Read the delta manifest of a snapshot (None if it was not crawled incrementally)"""
+    P_delta = P_save.parent / f"{P_save.stem}_delta.json"
+    if not P_delta.exists():
+        return None
+    with open(P_delta) as f:
+        return json.load(f)
+
+
+################################################################################
+# Helpers
+################################################################################
 
 
 def load_query_url(path: Path | str) -> str:
@@ -309,13 +462,8 @@ def extract_job_description(root, to_markdown=True) -> str:
     next_data_job = next_data_dict["props"]["pageProps"]["job"]
     data_job_description = next_data_job["job_information"]["description"]
     if to_markdown:
-        data_job_description = md(data_job_description, heading_style="ATX")
-    return (
-        data_job_description.replace("\xa0", " ")
-        .replace("\u200b", " ")
-        .replace("\u202f", " ")
-        .replace("’", "'")
-    )
+        return convert_one(data_job_description, heading_style="ATX", clean=True)
+    return clean_md(data_job_description)
 
 
 def extract_job_info(root) -> dict:
@@ -327,7 +475,7 @@ def extract_job_info(root) -> dict:
     return next_data_job
 
 
-@cache
+@response_cache(HTTP_CACHE, valid=has_job_data)
 def requests_get(url, proxy=False):
     # _user_agent = UserAgent().get_random_cycled()
     _user_agent = UserAgent.user_agent_106
@@ -353,7 +501,7 @@ def requests_get(url, proxy=False):
     return html_string
 
 
-@cache
+@response_cache(HTTP_CACHE, valid=has_job_data)
 def selenium_get(url, wait_time=2, proxy=False, driver=None):
     close_driver = False
     if driver is None:
@@ -377,23 +525,91 @@ def selenium_get(url, wait_time=2, proxy=False, driver=None):
 
 
 def identifier_get(identifier, save=False, verbose=True):
-    hash = identifier.rsplit(".", 1)[-1]
+    position, _, hash = identifier.rpartition(".")
     url = VIEW_JOB_HTTPS + hash
     # html_source = selenium_get(url)
     html_source = requests_get(url)
     if save:
-        P_url = P_URLS / f"{identifier}.html"
         if verbose:
-            print(f"Writing to {P_url}")
-        with open(P_url, "w", encoding="utf-8") as f:
-            f.write(html_source)
+            print(f"Saving {identifier}")
+        _save_job(hash, html_source, position=position or None)
     else:
         return html_source
 
 
+_CARD_CLASS = (
+    "relative bg-white rounded-xl border border-gray-200 shadow"
+    " hover:border-gray-500 md:hover:border-gray-200"
+)
+_XP_CARDS = etree.XPath("//div[@class=$card_class]")
+_XP_TITLE = etree.XPath("head/title/text()", smart_strings=False)
+_XP_TEXTS = etree.XPath(".//span/text()", smart_strings=False)
+_XP_URL = etree.XPath("div[2]/div/a[1]/@href", smart_strings=False)
+_XP_URL2 = etree.XPath("div[2]/div/a[2]/@href", smart_strings=False)
+_XP_BUTTONS = etree.XPath("count(.//div[@class='flex justify-center space-x-2']/div)")
+_DAYS_RE = re.compile(r"\d\d?[y|mo|w|d|h]")
+CARD_COLS: list[str] = [
+    "days",
+    "title",
+    "location",
+    "salary",
+    "onsite",
+    "full_time",
+    "company",
+    "company_stock",
+    "company_summary",
+    "yoe",
+    "mgmt",
+    "job_summary",
+    "skills",
+    "_job_posting",
+    "_views",
+]
+
+
+def _parse_card(card, company_=None) -> list:
+    """Job card fields (CARD_COLS order) from one walk over its span texts
+
+    Optional fields missing from the card are filled with "-". Cards of a company page
+    (`company_` given) have no company spans.
+    """
+    texts = [" ".join(x.split()) for x in _XP_TEXTS(card)]
+    if company_ is not None:
+        texts = texts[1:]
+    n_texts = len(texts)
+    fields = []
+    i = 0
+
+    def _take(is_field=None, default="-"):
+        nonlocal i
+        if i < n_texts and (is_field is None or is_field(texts[i])):
+            i += 1
+            return texts[i - 1]
+        return default if is_field is not None else None
+
+    fields.append(_take(_DAYS_RE.match, "0h"))
+    fields.append(_take())  # title
+    fields.append(_take())  # location
+    fields.append(_take(lambda x: x.endswith(("yr", "mo", "wk", "hr"))))
+    fields.append(_take())  # onsite
+    fields.append(_take())  # full_time
+    if company_ is None:
+        fields.append(_take())  # company
+        fields.append(_take(lambda x: not x.startswith(":")))
+    else:
+        fields.extend([company_, None])
+    fields.append(_take())  # company_summary
+    fields.append(_take(lambda x: x.endswith("YOE")))
+    fields.append(_take(lambda x: x.endswith("Mgmt")))
+    fields.append(_take())  # job_summary
+    fields.append(_take(lambda x: "Posting" not in x))
+    fields.append(_take())  # _job_posting
+    fields.append(_take())  # _views
+    return fields
+
+
 @cache
 def load_jdf(P_save: Path | str = P_STEM) -> pd.DataFrame:
-    _CLASS = "//div[@class='relative bg-white rounded-xl border border-gray-200 shadow hover:border-gray-500 md:hover:border-gray-200']"
     html_string = P_save
     if isinstance(P_save, Path):
         try:
@@ -408,121 +624,78 @@ def load_jdf(P_save: Path | str = P_STEM) -> pd.DataFrame:
     company_ = None
     if html_string:
         tree = lxml.html.fromstring(html_string)
-        _title_elem = tree.xpath("head/title")
-        if _title_elem:
-            company_ = f"{_title_elem[0].text}_"
-        all_cards = tree.xpath(_CLASS)
+        _title = _XP_TITLE(tree)
+        if _title:
+            company_ = " ".join(f"{_title[0]}_".split())
+        all_cards = _XP_CARDS(tree, card_class=_CARD_CLASS)
     else:
         path_list = [P_DATA / f"{query}.html" for query in QUERY_LIST]
-        html_list = [open(path, encoding="utf-8").read() for path in path_list]
-        tree_list = [lxml.html.fromstring(html) for html in html_list]
-        cards_list = [tree.xpath(_CLASS) for tree in tree_list]
-        all_cards = chain.from_iterable(cards_list)
+        all_cards = []
+        for path in path_list:
+            with open(path, encoding="utf-8") as f:
+                all_cards.extend(_XP_CARDS(lxml.html.fromstring(f.read()), card_class=_CARD_CLASS))
 
     use_chash = (company_ is None) or ("(N=" in company_)
-    raw_texts_list = []
+    columns: dict[str, list] = {col: [] for col in [*CARD_COLS, "hash", "chash", "_len"]}
+    card_columns = [columns[col] for col in CARD_COLS]
     for card in all_cards:
-        raw_texts = [x.strip() for x in card.xpath(".//span/text()")]
-        if not use_chash:
-            raw_texts = raw_texts[1:]
-        if not re.match(r"\d\d?[y|mo|w|d|h]", raw_texts[0]):
-            raw_texts.insert(0, "0h")
-        if (
-            not raw_texts[3].endswith("yr")
-            and not raw_texts[3].endswith("mo")
-            and not raw_texts[3].endswith("wk")
-            and not raw_texts[3].endswith("hr")
-        ):
-            raw_texts.insert(3, "-")
-        if not use_chash:
-            raw_texts.insert(6, company_)
-            raw_texts.insert(7, None)
-        if raw_texts[7].startswith(":"):
-            raw_texts.insert(7, "-")
-        if not raw_texts[9].endswith("YOE"):
-            raw_texts.insert(9, "-")
-        if not raw_texts[10].endswith("Mgmt"):
-            raw_texts.insert(10, "-")
-        if "Posting" in raw_texts[12]:
-            raw_texts.insert(12, "-")
-        url = card.xpath("div[2]/div/a[1]/@href")[0]
-        hash = url.split("/")[-1]
-
+        for column, value in zip(card_columns, _parse_card(card, None if use_chash else company_)):
+            column.append(value)
+        columns["hash"].append(_XP_URL(card)[0].split("/")[-1])
         if use_chash:
-            url2 = card.xpath("div[2]/div/a[2]/@href")[0]
-            chash = url2.removeprefix("/?company=").split("&", maxsplit=1)[0]
-            raw_texts_list.append([*raw_texts[:15], hash, chash])
-        else:
-            raw_texts_list.append([*raw_texts[:15], hash])
-    if use_chash:
-        _HEADER_COLS: list[str] = [
-            "days",
-            "title",
-            "location",
-            "salary",
-            "onsite",
-            "full_time",
-            "company",
-            "company_stock",
-            "company_summary",
-            "yoe",
-            "mgmt",
-            "job_summary",
-            "skills",
-            "_job_posting",
-            "_views",
-            "hash",
-            "chash",
-        ]
-    else:
-        _HEADER_COLS: list[str] = [
-            "days",
-            "title",
-            "location",
-            "salary",
-            "onsite",
-            "full_time",
-            "company",
-            "company_stock",
-            "company_summary",
-            "yoe",
-            "mgmt",
-            "job_summary",
-            "skills",
-            "_job_posting",
-            "_views",
-            "hash",
-        ]
-    HEADER_COLS = np.array(_HEADER_COLS)
-
-    jdf = pd.DataFrame(raw_texts_list, columns=HEADER_COLS).replace(r"\s+", " ", regex=True)
+            url2 = _XP_URL2(card)[0]
+            columns["chash"].append(url2.removeprefix("/?company=").split("&", maxsplit=1)[0])
+        columns["_len"].append(int(_XP_BUTTONS(card)))
+    if not use_chash:
+        del columns["chash"]
+
+    jdf = pd.DataFrame(columns)
     assert all(jdf["_job_posting"] == "Job Posting")
     jdf["company"] = jdf["company"].str.removesuffix(':').str.replace('"', "'").str.replace("’", "'")
     jdf = jdf.drop(columns=["_job_posting", "_views"])
-    _BUTTONS_CLASS = ".//div[@class='flex justify-center space-x-2']/div"
-    jdf["_len"] = pd.Series([len(card.xpath(_BUTTONS_CLASS)) for card in all_cards])
     jdf = _feature_engineering(jdf)
     return jdf
 
 
+# Card field formats: days "3d", salary "$120k-$150k/yr", yoe "5+ YOE", mgmt "2+ Mgmt"
+_HOURS_RE = r"^(?P<n>\d+)(?:.*\d)?(?P<unit>\D*)$"
+_HOURS_PER_UNIT = {"h": 1, "d": 24, "w": 24 * 7, "mo": 730, "y": 24 * 365}
+_SALARY_RE = r"^(?P<lower>[^/-]*)(?:-(?:[^/]*-)?(?P<upper>[^/-]*))?(?:/(?P<type>[^/]*))?"
+_SALARY_MULTIPLIER = {"yr": 1, "mo": 12, "hr": 2.080}
+_MIN_YEARS_RE = r"^([^+]*)"
+
+
+def _trie_pattern(words) -> str:
+    """Regex alternation of `words` factored into a prefix trie (longest match wins)"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def _pattern(node: dict) -> str:
+        alternatives = [re.escape(char) + _pattern(node[char]) for char in sorted(node) if char]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return _pattern(trie)
+
+
+@cache
+def _bay_cities_regex() -> re.Pattern:
+    SILICON_VALLEY = "Silicon Valley"
+    cities = pd.read_csv(P_DATA / "raw/cities.csv")[SILICON_VALLEY]
+    bay_cities = cities[~cities.str.startswith("#")]
+    return re.compile(_trie_pattern(bay_cities))
+
+
 def _feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
-    def load_cities() -> pd.DataFrame:
-        SILICON_VALLEY = "Silicon Valley"
-        cities = pd.read_csv(P_DATA / "raw/cities.csv")[SILICON_VALLEY]
-        bay_cities = cities[~cities.str.startswith("#")].reset_index(drop=True)
-        return bay_cities
-
-    df["hours"] = df["days"].str.split(r"\D").str[0].astype(int) * df["days"].str.split(r"\d").str[
-        -1
-    ].map({"h": 1, "d": 24, "w": 24 * 7, "mo": 730, "y": 24 * 365})
-    df["position"] = (
-        (df["company"].fillna('') + " - " + df["title"])
-        .str.replace(r"[/|:\\*?]", "_", regex=True)
-        .str.replace('"', "'")
-        .str.replace("’", "'")
-        .str.replace(r" +", " ", regex=True)
-        .str.strip()
-    )
+    _hours = df["days"].str.extract(_HOURS_RE)
+    df["hours"] = _hours["n"].astype(int) * _hours["unit"].map(_HOURS_PER_UNIT)
+    df["position"] = clean_position(df["company"], df["title"])
     df["_position"] = df["position"].str.lower()
     df = (
         df.sort_values(["position", "hours", "company_summary"])
@@ -531,32 +704,27 @@ def _feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
     )
     # df = df.sort_values(['_hours', 'position', 'company_summary']).drop_duplicates(subset='hash').reset_index(drop=True)
 
+    _salary = df["salary"].str.extract(_SALARY_RE)
+    _multiplier = _salary["type"].map(_SALARY_MULTIPLIER).fillna(0)
+    df["lower"] = (_salary["lower"].str[1:-1].pipe(pd.to_numeric, errors="coerce") * _multiplier).astype("float32")
+    _upper = _salary["upper"].fillna(_salary["lower"]).str[1:-1]
+    df["upper"] = (_upper.pipe(pd.to_numeric, errors="coerce") * _multiplier).astype("float32")
+    df["median"] = (df["lower"] + df["upper"]) / 2
+    for col in ["yoe", "mgmt"]:
+        _years = df[col].str.extract(_MIN_YEARS_RE, expand=False).pipe(pd.to_numeric, errors="coerce")
+        df[col] = _years.astype("float32")  # fractional, e.g. "0.5+"
+
+    # Cities are matched once per unique location; rows share the resulting tuples
     df["location"] = (
         df["location"].str.replace(", California", "").str.replace(", United States", "")
-    )
-    _salary_type = df["salary"].str.split("/").str[1]
-    _multiplier = (
-        (_salary_type == "yr") + 12 * (_salary_type == "mo") + 2.080 * (_salary_type == "hr")
-    )
-    _salary_range = df["salary"].str.split("/").str[0].str.split("-")
-    df["lower"] = (
-        _salary_range.str[0].str[1:-1].replace("", None).pipe(pd.to_numeric, errors="coerce")
-        * _multiplier
-    )
-    df["upper"] = (
-        _salary_range.str[-1].str[1:-1].replace("", None).pipe(pd.to_numeric, errors="coerce")
-        * _multiplier
-    )
-    df["median"] = (df["lower"] + df["upper"]) / 2
-    df["yoe"] = df["yoe"].str.split("+").str[0].pipe(pd.to_numeric, errors="coerce")
-    df["mgmt"] = df["mgmt"].str.split("+").str[0].pipe(pd.to_numeric, errors="coerce")
-
-    bay_cities = load_cities()
-    regex_bay_cities = f"({'|'.join(bay_cities)})"
-    df["bay"] = df["location"].str.extractall(regex_bay_cities).groupby(level=0)[0].apply(tuple)
-    # _series = df['location'].str.extractall(regex_bay_cities)
-    # for i in range(4):
-    #     df[f'bay{i}'] = _series[0].loc[:,i].reindex_like(df)#.fillna('')
+    ).astype("category")
+    _regex = _bay_cities_regex()
+    _categories = df["location"].cat.categories
+    bay_by_code = np.full(len(_categories) + 1, np.nan, dtype=object)
+    for code, location in enumerate(_categories):
+        bay_by_code[code] = tuple(_regex.findall(location)) or np.nan
+    df["bay"] = bay_by_code[df["location"].cat.codes.to_numpy()]
+    df["company"] = df["company"].astype("category")
     return df
 
 
@@ -0,0 +1,241 @@
+"""
+Embed jobs with a local LM Studio model and rank them against a resume
+
+Vectors (unit length, float16) are appended to a memory-mapped matrix under P_EMBED,
+keyed by `_hash`, so only new jobs are embedded on each update. Top-k cosine queries run
+as blocked matrix products over the memmap; `build_ivf` adds an approximate inverted-file
+index for larger corpora.
+
+Usage:
+>>> from job_search.embed import rank_jobs
+>>> rank_jobs(P_RESUME, k=20)
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from job_search.config import P_EMBED, P_RESUME
+
+EMBED_MODEL = "text-embedding-nomic-embed-text-v1.5"
+EMBED_COLS = ("requirements_summary", "_md")
+MAX_CHARS = 8000  # keep job text within the embedding model's context
+BATCH_SIZE = 64
+BLOCK = 16384
+
+
+def embed_texts(texts, model=EMBED_MODEL, batch_size=BATCH_SIZE) -> np.ndarray:
+    """Unit-length float32 embeddings of `texts`, requested in batches"""
+    import lmstudio as lms
+
+    _model = lms.embedding_model(model)
+    texts = list(texts)
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(_model.embed(texts[i : i + batch_size]))
+    return _normalize(np.asarray(vectors, dtype=np.float32))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def job_texts(jobs_df: pd.DataFrame, cols=EMBED_COLS, max_chars=MAX_CHARS) -> pd.Series:
+    """Text embedded per job: `cols` joined by blank lines, truncated to `max_chars`"""
+    _texts = [jobs_df[col].astype(object).fillna("").astype(str) for col in cols]
+    return pd.concat(_texts, axis=1).agg("\n\n".join, axis=1).str[:max_chars]
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if len(scores) <= k:
+        return np.arange(len(scores))
+    return np.argpartition(scores, -k)[-k:]
+
+
+class EmbeddingStore:
+    """Append-only float16 matrix of job vectors keyed by `_hash`
+
+    Files under `path`: `{model}.f16` (vectors), `{model}.hashes` (one hash per row) and
+    `{model}.json` (dimension). The hashes file defines the row count, so an interrupted
+    append is truncated on the next write.
+    """
+
+    def __init__(self, model=EMBED_MODEL, path: Path = P_EMBED):
+        self.model = model
+        _stem = model.replace("/", "_")
+        self.P_vectors = path / f"{_stem}.f16"
+        self.P_hashes = path / f"{_stem}.hashes"
+        self.P_meta = path / f"{_stem}.json"
+        self.P_ivf = path / f"{_stem}.ivf.npz"
+        self.dim = json.loads(self.P_meta.read_text())["dim"] if self.P_meta.exists() else None
+        self.hashes = self.P_hashes.read_text().split() if self.P_hashes.exists() else []
+        self.positions = {hash: i for i, hash in enumerate(self.hashes)}
+        self._vectors = None
+        self._ivf = None
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._vectors is None:
+            if not self.hashes:
+                return np.empty((0, self.dim or 0), dtype=np.float16)
+            self._vectors = np.memmap(self.P_vectors, np.float16, "r", shape=(len(self), self.dim))
+        return self._vectors
+
+    def add(self, hashes, vectors: np.ndarray):
+        """Append unit `vectors` for new `hashes`"""
+        hashes = list(hashes)
+        if not hashes:
+            return
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self.P_meta.parent.mkdir(parents=True, exist_ok=True)
+            self.P_meta.write_text(json.dumps({"model": self.model, "dim": self.dim}))
+        self._vectors = None
+        with open(self.P_vectors, "ab") as f:
+            f.truncate(len(self) * self.dim * 2)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float16).tobytes())
+        with open(self.P_hashes, "a") as f:
+            f.write("".join(f"{hash}\n" for hash in hashes))
+        for hash in hashes:
+            self.positions[hash] = len(self.hashes)
+            self.hashes.append(hash)
+
+    def update(self, jobs_df: pd.DataFrame, embed=embed_texts, batch_size=1024) -> int:
+        """Embed jobs of `jobs_df` not yet stored; returns the number added"""
+        new_df = jobs_df[~jobs_df["_hash"].isin(self.positions)].drop_duplicates(subset="_hash")
+        for i in range(0, len(new_df), batch_size):
+            batch_df = new_df.iloc[i : i + batch_size]
+            if not set(EMBED_COLS) <= set(batch_df.columns):
+                from job_search.jobs import get_many
+
+                batch_df = get_many(batch_df["_hash"], jobs_df)  # slim frame: read `_md` lazily
+            self.add(batch_df["_hash"], embed(job_texts(batch_df), model=self.model))
+        return len(new_df)
+
+    def get(self, hashes) -> np.ndarray:
+        return np.asarray(self.vectors[[self.positions[hash] for hash in hashes]], dtype=np.float32)
+
+    ############################################################################
+    # Queries
+    ############################################################################
+
+    def search(self, query: np.ndarray, k=20, hashes=None, approximate=False, n_probe=8,
+               block=BLOCK) -> pd.Series:
+        """Top-k cosine similarities to `query`, as a Series of scores indexed by `_hash`
+
+        Args:
+            hashes (Iterable[str], optional): only rank these jobs
+            approximate (bool): probe the `n_probe` nearest IVF lists (see `build_ivf`)
+        """
+        query = _normalize(np.asarray(query, dtype=np.float32).ravel())
+        if hashes is not None:
+            rows = np.array([self.positions[hash] for hash in hashes if hash in self.positions], dtype=np.int64)
+        elif approximate and self._load_ivf() is not None:
+            rows = self._probe(query, n_probe)
+        else:
+            rows = None
+        best_rows, best_scores = self._scan(query, k, rows, block)
+        order = np.argsort(-best_scores)
+        return pd.Series(best_scores[order], index=[self.hashes[i] for i in best_rows[order]], name="score")
+
+    def _scan(self, query, k, rows=None, block=BLOCK) -> tuple[np.ndarray, np.ndarray]:
+        n = len(self) if rows is None else len(rows)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, n, block):
+            if rows is None:
+                _rows = np.arange(start, min(start + block, n))
+                _vectors = self.vectors[start : start + block]
+            else:
+                _rows = np.sort(rows[start : start + block])
+                _vectors = self.vectors[_rows]
+            scores = np.asarray(_vectors, dtype=np.float32) @ query
+            top = _top_k(scores, k)
+            best_rows = np.concatenate([best_rows, _rows[top]])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            keep = _top_k(best_scores, k)
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+        return best_rows, best_scores
+
+    ############################################################################
+    # Approximate index
+    ############################################################################
+
+    def build_ivf(self, n_lists=None, iters=10, sample=50_000, seed=0, block=BLOCK):
+        """Cluster the vectors with spherical k-means into `n_lists` inverted lists
+
+        Rows added after the build are always scanned exactly, so the index stays valid as
+        jobs arrive; rebuild it once the unindexed tail grows large.
+        """
+        rng = np.random.default_rng(seed)
+        n = len(self)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        _sample = np.sort(rng.choice(n, min(n, sample), replace=False))
+        X = np.asarray(self.vectors[_sample], dtype=np.float32)
+        centroids = X[rng.choice(len(X), n_lists, replace=False)]
+        for _ in range(iters):
+            assign = np.argmax(X @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, X)
+            filled = np.bincount(assign, minlength=n_lists) > 0
+            centroids[filled] = _normalize(sums[filled])
+        assign = np.concatenate([
+            np.argmax(np.asarray(self.vectors[start : start + block], dtype=np.float32) @ centroids.T, axis=1)
+            for start in range(0, n, block)
+        ])
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=n_lists), out=offsets[1:])
+        np.savez(self.P_ivf, centroids=centroids, order=order, offsets=offsets, n=n)
+        self._ivf = None
+
+    def _load_ivf(self) -> dict | None:
+        if self._ivf is None and self.P_ivf.exists():
+            with np.load(self.P_ivf) as npz:
+                self._ivf = {name: npz[name] for name in npz.files}
+        return self._ivf
+
+    def _probe(self, query, n_probe) -> np.ndarray:
+        ivf = self._load_ivf()
+        lists = _top_k(ivf["centroids"] @ query, n_probe)
+        offsets, order = ivf["offsets"], ivf["order"]
+        rows = [order[offsets[i] : offsets[i + 1]] for i in lists]
+        rows.append(np.arange(int(ivf["n"]), len(self)))
+        return np.concatenate(rows)
+
+
+def resume_vector(resume_path: Path = P_RESUME, by_section=False, model=EMBED_MODEL) -> np.ndarray:
+    """Embedding of a markdown resume, or the mean of its `##` sections' embeddings"""
+    if not by_section:
+        return embed_texts([Path(resume_path).read_text(encoding="utf-8")], model=model)[0]
+    from job_search.resume import analyze
+
+    mdf = analyze(resume_path, explode=False)
+    _section = (mdf["_tag"] == "h2").cumsum()
+    sections = mdf.groupby(_section)["content"].agg("\n".join)
+    return _normalize(embed_texts(sections, model=model).mean(axis=0))
+
+
+def rank_jobs(resume_path: Path = P_RESUME, k=20, jobs_df=None, by_section=False,
+              approximate=False, model=EMBED_MODEL) -> pd.DataFrame:
+    """Top-k jobs of `jobs_df` (default `load_jobs()`) by cosine similarity to a resume
+
+    New jobs are embedded first.
+    """
+    from job_search.jobs import get_many, load_jobs
+
+    if jobs_df is None:
+        jobs_df = load_jobs()
+    store = EmbeddingStore(model)
+    store.update(jobs_df)
+    query = resume_vector(resume_path, by_section, model)
+    hashes = None if approximate else jobs_df["_hash"]
+    scores = store.search(query, k, hashes=hashes, approximate=approximate)
+    ranked_df = get_many(scores.index, jobs_df)
+    return ranked_df.assign(score=scores.reindex(ranked_df["_hash"]).to_numpy())
@@ -0,0 +1,248 @@
+"""
+Fetch job pages concurrently
+"""
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+from pathlib import Path
+import queue
+import random
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+_NEXT_DATA_RE = re.compile(r'<script[^>]*\bid="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+
+
+class HostLimiter:
+    """Cap concurrent requests per host and space out their start times
+
+    Args:
+        per_host (int): maximum in-flight requests per host
+        delay (tuple[float, float]): random.uniform bounds (seconds) between request starts
+    """
+
+    def __init__(self, per_host=4, delay=(0.0, 0.0)):
+        self.per_host = per_host
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    @contextmanager
+    def __call__(self, url: str):
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            semaphore = self._semaphores[host]
+        with semaphore:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + random.uniform(*self.delay)
+            time.sleep(start - now)
+            yield
+
+
+class DriverPool:
+    """Pool of Selenium drivers shared by fetch workers
+
+    Drivers are started lazily (at most `size`) and closed on exit.
+
+    Usage:
+    >>> with DriverPool(4, init=init_driver, get=selenium_get) as pool:
+    ...     html = pool.get(url)
+    """
+
+    def __init__(self, size, init, get):
+        self.size = size
+        self._init = init
+        self._get = get
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._drivers: list = []
+        self._started = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def driver(self):
+        with self._lock:
+            start_new = self._idle.empty() and self._started < self.size
+            if start_new:
+                self._started += 1
+        if start_new:
+            driver = self._init()
+            self._drivers.append(driver)
+        else:
+            driver = self._idle.get()
+        try:
+            yield driver
+        finally:
+            self._idle.put(driver)
+
+    def get(self, url: str) -> str:
+        with self.driver() as driver:
+            return self._get(url, driver=driver)
+
+    def close(self):
+        for driver in self._drivers:
+            driver.quit()
+        self._drivers.clear()
+        self._idle = queue.LifoQueue()
+        self._started = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def has_job_data(html: str) -> bool:
+    """Whether `html` carries the `__NEXT_DATA__` job blob read by `extract_job_info`"""
+    match = _NEXT_DATA_RE.search(html or "")
+    if match is None:
+        return False
+    try:
+        next_data_dict = json.loads(match.group(1))
+        return bool(next_data_dict["props"]["pageProps"]["job"])
+    except (ValueError, KeyError, TypeError):
+        return False
+
+
+class TieredGetter:
+    """Page getter that tries cheap tiers first and falls back on pages missing the job blob
+
+    `counts` records which tier served each page ("failed" when none did). A page no tier
+    served comes back as an empty string, so it is not stored and gets retried.
+
+    Usage:
+    >>> get = TieredGetter({"requests": requests_get, "selenium": pool.get})
+    >>> html = get(url)
+    >>> get.counts
+    Counter({'requests': 97, 'selenium': 3})
+    """
+
+    def __init__(self, tiers: dict, check=has_job_data):
+        self.tiers = tiers
+        self.check = check
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str) -> str:
+        for tier, get in self.tiers.items():
+            try:
+                html = get(url)
+            except Exception as e:  # noqa: BLE001 - any tier error falls through to the next tier
+                logger.info(f"{tier} failed for {url}: {e!r}")
+                continue
+            if self.check(html):
+                self._count(tier)
+                return html
+        self._count("failed")
+        return ""
+
+    def _count(self, tier):
+        with self._lock:
+            self.counts[tier] += 1
+
+
+def fetch_many(urls, get, workers=8, per_host=4, delay=(0.0, 0.0)):
+    """Fetch `urls` with a bounded worker pool, yielding (url, html) as pages complete
+
+    Failed pages yield an empty string, matching how `_save_dicts` treats empty pages.
+
+    Args:
+        urls (Iterable[str]): urls to fetch
+        get (Callable[[str], str]): page getter, e.g. `requests_get` or `DriverPool.get`
+        workers (int): number of worker threads
+        per_host (int): maximum in-flight requests per host
+        delay (tuple[float, float]): random spacing (seconds) between requests to one host
+    """
+    limiter = HostLimiter(per_host, delay)
+
+    def _fetch(url):
+        with limiter(url):
+            return get(url)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_fetch, url): url for url in urls}
+        try:
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    yield url, future.result()
+                except Exception as e:  # noqa: BLE001 - one failed page must not stop the batch
+                    logger.warning(f"Failed to fetch {url}: {e!r}")
+                    yield url, ""
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def urllib_get(url: str, timeout=30) -> str:
+    """Plain urllib getter (for the local stand-in server)"""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read().decode()
+
+
+################################################################################
+# Local stand-in server
+################################################################################
+
+
+def serve_pages(directory: Path | None = None, port=0, latency=(0.0, 0.0)):
+    """Serve saved job pages at http://127.0.0.1:{port}/viewjob/{hash} in a background thread
+
+    Pages are read from the job store, or by hash from `{position}.{hash}.html` files when
+    `directory` is given.
+
+    Args:
+        directory (Path, optional): directory of saved `__NEXT_DATA__` pages
+        port (int): port to bind (0 picks a free port)
+        latency (tuple[float, float]): random.uniform bounds (seconds) added to each response
+
+    Returns:
+        (ThreadingHTTPServer, str): running server (stop with `.shutdown()`) and its base url
+    """
+    from job_search.store import get_job
+
+    if directory is not None:
+        hash2path = {p.stem.rsplit(".", 1)[-1]: p for p in Path(directory).glob("*.html")}
+
+    def _load_page(hash: str) -> bytes | None:
+        if directory is not None:
+            return hash2path[hash].read_bytes() if hash in hash2path else None
+        job = get_job(hash, fields=("html",))
+        return None if job is None or job["html"] is None else job["html"].encode()
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hash = self.path.rstrip("/").rsplit("/", 1)[-1]
+            time.sleep(random.uniform(*latency))
+            body = _load_page(hash)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/viewjob/"
+    return server, base_url
@@ -0,0 +1,377 @@
+"""
+Inverted keyword index over the jobs corpus
+
+Per-column postings (sorted row ids per lowercase token) answer word-start prefix queries
+like the `\\b{keyword}` regexes of `cmask`/`rmask` without scanning every description.
+Multi-word phrases are narrowed with postings and then confirmed by a regex on the
+candidate rows only.
+
+Results are `Mask`s: packed bits over the index rows (a stable row id per `_hash`) that
+combine with `&`, `|` and `~` and convert to pandas masks or hash sets.
+
+List columns such as `technical_tools` are dictionary-encoded by `ToolIndex` (a tool
+vocabulary plus a CSR row -> tool mapping) so tool queries run once over the vocabulary.
+
+Usage:
+>>> index = JobIndex.build(jobs_df, MASK_COLS)
+>>> mask = index.search('python AND (spark OR dbt) AND NOT "machine learning"')
+>>> (mask & ~masks['norcal']).count()
+>>> jobs_df[mask.to_series(jobs_df)]
+>>> tools = ToolIndex.build(jobs_df['technical_tools'])
+>>> tools.match('spark|databricks'), tools.counts().head()
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import chain
+from pathlib import Path
+import re
+
+import numpy as np
+import pandas as pd
+
+TOKEN_RE = re.compile(r"\w+")
+# Keywords the index can answer: no regex metacharacters
+PLAIN_RE = re.compile(r"[\w\s'&/#-]+")
+_QUERY_RE = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+
+
+def _as_text(value) -> str:
+    if isinstance(value, str):
+        return value
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    return "; ".join(value)
+
+
+def is_plain(keyword: str) -> bool:
+    """Whether `keyword` is a literal word or phrase the index can answer"""
+    return bool(PLAIN_RE.fullmatch(keyword)) and bool(TOKEN_RE.search(keyword))
+
+
+class Mask:
+    """Row mask stored as packed bits over a fixed universe of job hashes
+
+    Args:
+        bits (np.ndarray): `np.packbits` of the boolean rows
+        universe (pd.Index): `_hash` of each row; masks over the same universe combine
+    """
+
+    __slots__ = ("bits", "universe")
+
+    def __init__(self, bits: np.ndarray, universe: pd.Index):
+        self.bits = bits
+        self.universe = universe
+
+    @classmethod
+    def from_rows(cls, rows: np.ndarray, universe: pd.Index) -> "Mask":
+        return cls(np.packbits(np.asarray(rows, dtype=bool)), universe)
+
+    @classmethod
+    def from_hashes(cls, hashes, universe: pd.Index) -> "Mask":
+        rows = np.zeros(len(universe), dtype=bool)
+        positions = universe.get_indexer(list(hashes))
+        rows[positions[positions >= 0]] = True
+        return cls.from_rows(rows, universe)
+
+    @classmethod
+    def from_series(cls, mask: pd.Series, hashes: pd.Series, universe: pd.Index) -> "Mask":
+        """From a boolean Series and the `_hash` Series of the same frame"""
+        return cls.from_hashes(hashes[mask.fillna(False).astype(bool)], universe)
+
+    def rows(self) -> np.ndarray:
+        return np.unpackbits(self.bits, count=len(self.universe)).astype(bool)
+
+    def count(self) -> int:
+        """Popcount (padding bits are always zero)"""
+        return int(np.unpackbits(self.bits).sum())
+
+    def __len__(self) -> int:
+        return len(self.universe)
+
+    def _check(self, other: "Mask"):
+        if other.universe is not self.universe and not other.universe.equals(self.universe):
+            raise ValueError("Masks are over different corpus versions")
+
+    def __and__(self, other: "Mask") -> "Mask":
+        self._check(other)
+        return Mask(self.bits & other.bits, self.universe)
+
+    def __or__(self, other: "Mask") -> "Mask":
+        self._check(other)
+        return Mask(self.bits | other.bits, self.universe)
+
+    def __invert__(self) -> "Mask":
+        bits = ~self.bits
+        if (pad := -len(self.universe) % 8) and len(bits):
+            bits[-1] &= np.uint8(0xFF << pad & 0xFF)
+        return Mask(bits, self.universe)
+
+    def to_series(self, jobs_df: pd.DataFrame | None = None) -> pd.Series:
+        """Boolean Series over the universe rows, or aligned to `jobs_df` by `_hash`"""
+        rows = self.rows()
+        if jobs_df is None:
+            return pd.Series(rows, index=self.universe)
+        positions = self.universe.get_indexer(jobs_df["_hash"])
+        return pd.Series(np.where(positions >= 0, rows[positions], False), index=jobs_df.index)
+
+    def to_hashes(self) -> set[str]:
+        return set(self.universe[self.rows()])
+
+    def __repr__(self) -> str:
+        return f"Mask({self.count():,} of {len(self):,})"
+
+
+class JobIndex:
+    """Token postings per column for a frame of jobs (rows keyed by `_hash`)
+
+    Args:
+        hashes (np.ndarray): `_hash` of each row, in frame order
+        postings (dict): column -> (vocab, indptr, indices) in CSR layout
+        key (str): corpus version the index was built from
+    """
+
+    def __init__(self, hashes, postings: dict, key=""):
+        self.hashes = np.asarray(hashes)
+        self.universe = pd.Index(self.hashes)
+        self.postings = postings
+        self.key = key
+        self.n = len(self.hashes)
+        self._texts: pd.DataFrame | None = None
+        self._load_texts = None
+
+    @classmethod
+    def build(cls, jobs_df: pd.DataFrame, cols, key="") -> "JobIndex":
+        postings = {col: _build_postings(jobs_df[col].map(_as_text)) for col in cols}
+        return cls(jobs_df["_hash"].to_numpy(), postings, key).attach(jobs_df)
+
+    def attach(self, jobs_df: pd.DataFrame, load_texts=None) -> "JobIndex":
+        """Keep the indexed columns of `jobs_df` to confirm phrase matches
+
+        Columns missing from `jobs_df` (e.g. left on disk by a slim frame) are read for
+        candidate rows only, by `load_texts(hashes, [col])` (a frame indexed by hash).
+        """
+        assert len(jobs_df) == self.n, "Frame does not match the index"
+        self._texts = jobs_df[[col for col in self.postings if col in jobs_df]]
+        self._load_texts = load_texts
+        return self
+
+    ############################################################################
+    # Queries (boolean row arrays)
+    ############################################################################
+
+    def term(self, token: str, cols=None, prefix=True) -> np.ndarray:
+        """Rows with a token in `cols` equal to (or starting with) lowercase `token`"""
+        rows = np.zeros(self.n, dtype=bool)
+        for col in cols or self.postings:
+            vocab, indptr, indices = self.postings[col]
+            start = bisect_left(vocab, token)
+            stop = bisect_left(vocab, token + "\U0010ffff") if prefix else start + (
+                start < len(vocab) and vocab[start] == token
+            )
+            rows[indices[indptr[start] : indptr[stop]]] = True
+        return rows
+
+    def keyword(self, keyword: str, cols=None) -> np.ndarray:
+        """Rows matching `\\b{keyword}` (case-insensitive) in any of `cols`"""
+        cols = list(cols or self.postings)
+        tokens = TOKEN_RE.findall(keyword.lower())
+        if len(tokens) == 1 and TOKEN_RE.fullmatch(keyword):
+            return self.term(tokens[0], cols)
+        # Phrase: every full token must occur in the same column, the last as a prefix
+        rows = np.zeros(self.n, dtype=bool)
+        _regex = re.compile(r"\b" + re.escape(keyword), re.IGNORECASE)
+        for col in cols:
+            candidates = self.term(tokens[-1], [col])
+            for token in tokens[:-1]:
+                candidates &= self.term(token, [col], prefix=False)
+            (candidate_rows,) = np.nonzero(candidates)
+            if self._texts is not None and col in self._texts:
+                _col_texts = self._texts[col].iloc[candidate_rows]
+            elif self._load_texts is not None and len(candidate_rows):
+                _hashes = self.hashes[candidate_rows]
+                _col_texts = self._load_texts(_hashes, [col])[col].reindex(_hashes)
+            else:
+                rows[candidate_rows] = True
+                continue
+            _col_texts = _col_texts.astype(object).map(_as_text)
+            rows[candidate_rows] = _col_texts.str.contains(_regex).to_numpy()
+        return rows
+
+    def any_of(self, keywords, cols=None) -> np.ndarray:
+        rows = np.zeros(self.n, dtype=bool)
+        for keyword in keywords:
+            rows |= self.keyword(keyword, cols)
+        return rows
+
+    def mask(self, rows: np.ndarray) -> Mask:
+        return Mask.from_rows(rows, self.universe)
+
+    def search(self, query: str, cols=None, named: dict | None = None) -> Mask:
+        """Evaluate a boolean query to a `Mask`
+
+        Terms are words (word-start prefix match) or "quoted phrases"; operators are AND,
+        OR, NOT and parentheses, with AND implied between adjacent terms. Bare words found
+        in `named` refer to those precomputed masks instead.
+        """
+        named = named or {}
+
+        def term(token: str) -> np.ndarray:
+            if token in named:
+                return named[token].rows()
+            return self.keyword(token.strip('"'), cols)
+
+        tokens = _QUERY_RE.findall(query)
+        rows, i = self._parse_or(tokens, 0, term)
+        if i != len(tokens):
+            raise ValueError(f"Unexpected {tokens[i]!r} in query: {query}")
+        return self.mask(rows)
+
+    def _parse_or(self, tokens, i, term):
+        rows, i = self._parse_and(tokens, i, term)
+        while i < len(tokens) and tokens[i] == "OR":
+            _rows, i = self._parse_and(tokens, i + 1, term)
+            rows = rows | _rows
+        return rows, i
+
+    def _parse_and(self, tokens, i, term):
+        rows, i = self._parse_not(tokens, i, term)
+        while i < len(tokens) and tokens[i] not in ("OR", ")"):
+            if tokens[i] == "AND":
+                i += 1
+            _rows, i = self._parse_not(tokens, i, term)
+            rows = rows & _rows
+        return rows, i
+
+    def _parse_not(self, tokens, i, term):
+        if i < len(tokens) and tokens[i] == "NOT":
+            rows, i = self._parse_not(tokens, i + 1, term)
+            return ~rows, i
+        return self._parse_atom(tokens, i, term)
+
+    def _parse_atom(self, tokens, i, term):
+        if i >= len(tokens):
+            raise ValueError("Incomplete query")
+        if tokens[i] == "(":
+            rows, i = self._parse_or(tokens, i + 1, term)
+            if i >= len(tokens) or tokens[i] != ")":
+                raise ValueError("Unbalanced parentheses")
+            return rows, i + 1
+        if tokens[i] in ("AND", "OR", ")"):
+            raise ValueError(f"Expected a term, got {tokens[i]!r}")
+        return term(tokens[i]), i + 1
+
+    ############################################################################
+    # Persistence
+    ############################################################################
+
+    def save(self, path: Path):
+        arrays = {"hashes": self.hashes.astype(str), "key": np.array(self.key)}
+        for col, (vocab, indptr, indices) in self.postings.items():
+            arrays[f"{col}.vocab"] = np.array("\n".join(vocab))
+            arrays[f"{col}.indptr"] = indptr
+            arrays[f"{col}.indices"] = indices
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: Path) -> "JobIndex":
+        with np.load(path) as npz:
+            cols = [name.removesuffix(".vocab") for name in npz.files if name.endswith(".vocab")]
+            postings = {
+                col: (
+                    str(npz[f"{col}.vocab"]).split("\n") if npz[f"{col}.indptr"].size > 1 else [],
+                    npz[f"{col}.indptr"],
+                    npz[f"{col}.indices"],
+                )
+                for col in cols
+            }
+            return cls(npz["hashes"].astype(object), postings, str(npz["key"]))
+
+
+class ToolIndex:
+    """Dictionary-encoded list column: tool vocabulary plus CSR row -> tool ids
+
+    Args:
+        vocab (np.ndarray): unique tools (original case)
+        indptr (np.ndarray): row i holds tool ids `indices[indptr[i]:indptr[i + 1]]`
+        indices (np.ndarray): tool ids into `vocab`
+        index (pd.Index): row labels of the source Series
+    """
+
+    def __init__(self, vocab, indptr, indices, index=None):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.indices = indices
+        self.index = index
+        self.n = len(indptr) - 1
+        self._row_of = np.repeat(np.arange(self.n), np.diff(indptr))
+        self._lower = None
+
+    @classmethod
+    def build(cls, pd_series: pd.Series) -> "ToolIndex":
+        lists = [() if isinstance(x, float) or x is None else x for x in pd_series]
+        lengths = np.fromiter((len(x) for x in lists), np.int64, count=len(lists))
+        indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        flat = np.fromiter(chain.from_iterable(lists), object, count=indptr[-1])
+        codes, vocab = pd.factorize(flat)
+        # drop null tools (code -1) and shrink their rows
+        is_tool = codes >= 0
+        if not is_tool.all():
+            _row_of = np.repeat(np.arange(len(lists)), lengths)
+            np.cumsum(np.bincount(_row_of[is_tool], minlength=len(lists)), out=indptr[1:])
+            codes = codes[is_tool]
+        vocab = np.asarray(vocab, dtype=object)
+        return cls(vocab, indptr, codes.astype(np.int32), pd_series.index)
+
+    @property
+    def lower(self) -> np.ndarray:
+        if self._lower is None:
+            self._lower = np.array([tool.lower() for tool in self.vocab], dtype=object)
+        return self._lower
+
+    def rows(self, tool_mask: np.ndarray) -> np.ndarray:
+        """Rows holding any tool selected by a boolean mask over the vocabulary"""
+        rows = np.zeros(self.n, dtype=bool)
+        rows[self._row_of[tool_mask[self.indices]]] = True
+        return rows
+
+    def match(self, pattern: str, case=None) -> np.ndarray:
+        """Rows with a tool matching `re.match(pattern, tool)`
+
+        With `case=None`, a lowercase pattern matches case-insensitively.
+        """
+        if case is None:
+            case = pattern != pattern.lower()
+        vocab = self.vocab if case else self.lower
+        _regex = re.compile(pattern if case else pattern.lower())
+        return self.rows(np.fromiter((bool(_regex.match(t)) for t in vocab), bool, len(vocab)))
+
+    def isin(self, tools, case=False) -> np.ndarray:
+        """Rows holding any of `tools` exactly"""
+        if case:
+            return self.rows(np.isin(self.vocab, list(tools)))
+        return self.rows(np.isin(self.lower, [tool.lower() for tool in tools]))
+
+    def counts(self, lower=False) -> pd.Series:
+        """Occurrences of each tool across rows, most frequent first"""
+        counts = pd.Series(np.bincount(self.indices, minlength=len(self.vocab)),
+                           index=self.lower if lower else self.vocab)
+        if lower:
+            counts = counts.groupby(level=0).sum()
+        return counts.sort_values(ascending=False)
+
+
+def _build_postings(texts: pd.Series) -> tuple[list[str], np.ndarray, np.ndarray]:
+    token_rows = defaultdict(list)
+    for row, text in enumerate(texts):
+        for token in set(TOKEN_RE.findall(text.lower())):
+            token_rows[token].append(row)
+    vocab = sorted(token_rows)
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum([len(token_rows[token]) for token in vocab], out=indptr[1:])
+    indices = np.fromiter(
+        chain.from_iterable(token_rows[token] for token in vocab), np.uint32, count=indptr[-1]
+    )
+    return vocab, indptr, indices
@@ -1,16 +1,28 @@
+from concurrent.futures import ProcessPoolExecutor
 from functools import cache, reduce
+from pathlib import Path
 import pickle
-import re
+import time
+import weakref
 
-import duckdb
-from IPython.display import Markdown, display
-from markdownify import markdownify as md
+import numpy as np
 import pandas as pd
-
-from job_search.ai import llm_extract
-from job_search.config import DS_HEALTH, DS_NORCAL, P_CACHE, P_PROCESSED, P_ROOT, VIEW_JOB_HTTPS
-from job_search.dataset import load_jdf
-from job_search.utils import paths_df
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from job_search.config import (
+    DS_HEALTH,
+    DS_NORCAL,
+    P_CACHE,
+    P_JDF,
+    P_PROCESSED,
+    P_ROOT,
+    VIEW_JOB_HTTPS,
+)
+from job_search.index import JobIndex, Mask, ToolIndex, is_plain
+from job_search.mdconvert import convert
+from job_search.store import get_job
+from job_search.utils import clean_position, highlight
 
 COLS = ['company_name', 'title', 'estimated_publish_date', 'requirements_summary',
         'job_category', 'workplace_type', 'formatted_workplace_location',
@@ -23,96 +35,330 @@ COLS = ['company_name', 'title', 'estimated_publish_date', 'requirements_summary
 MASK_COLS = ['company_name', 'title', '_hash', 'requirements_summary', 'technical_tools',
              'role_activities', 'job_category', 'seniority_level', 'workplace_type',
              'formatted_workplace_location', 'company_tagline', '_md']
+# Left on disk by `load_jobs(slim=True)` and read per job by `load_heavy`
+HEAVY_COLS = ['description', '_md']
+SLIM_CATEGORIES = ['company_name', 'workplace_type', 'seniority_level', 'job_category',
+                   'formatted_workplace_location', 'commitment']
+# Columns concatenated by `_load_text`
+TEXT_COLS = ['company_name', 'title', '_hash', 'requirements_summary', 'technical_tools',
+             'role_activities', 'seniority_level', 'company_tagline', '_md']
 
 
 @cache
-def load_jobs(db='jobs.duckdb', clean=True, overwrite=False) -> pd.DataFrame:
+def load_jobs(db='jobs.duckdb', clean=True, overwrite=False, slim=False) -> pd.DataFrame:
+    """Jobs from the DuckDB `jobs` table (synced to parquet first)
+
+    With `slim`, HEAVY_COLS are left on disk (see `load_heavy`), strings are Arrow-backed
+    and SLIM_CATEGORIES are categorical.
+    """
     if isinstance(db, str):
         db = P_ROOT / db
-    P_parquet = P_CACHE / f'{db.stem}.parquet'
-    if overwrite or not P_parquet.exists():
-        with duckdb.connect(db) as con:
-            jobs_df = con.table("jobs").df()
-
-        jobs_df['_md'] = jobs_df['description'].map(md)
-        jobs_df['_url'] = VIEW_JOB_HTTPS + jobs_df['requisition_id']
-        jobs_df['_hash'] = jobs_df['requisition_id']
-
-        P_parquet.parent.mkdir(exist_ok=True)
-        jobs_df.to_parquet(P_parquet)
-        print('Saving:', P_parquet)
-    else:
-        jobs_df = pd.read_parquet(P_parquet)
+    if overwrite:
+        for P_part in _jobs_parquets(db):
+            P_part.unlink()
+    sync_jobs(db)
+    jobs_df = _read_jobs_parquets(db, slim=slim)
 
     if clean:
         jobs_df = jobs_df.dropna(how='all')
         # jobs_df['estimated_publish_date'] = jobs_df['estimated_publish_date'].dt.tz_localize('UTC')
         sf_remote_mask = jobs_df['formatted_workplace_location'].str.contains('San Francisco|San Jose', case=False)
-        jobs_df['norcal'] = _norcal_mask(jobs_df) | sf_remote_mask
-        jobs_df['health'] = cmask(['health', 'medical', 'biotech'], col='company_activities')
+        jobs_df['norcal'] = _norcal_mask(jobs_df) | sf_remote_mask.fillna(False).astype(bool)
+        jobs_df['health'] = _contains_mask(jobs_df['company_activities'], ['health', 'medical', 'biotech'])
         jobs_df['jan'] = jobs_df['estimated_publish_date'] >= "2026-01-01"
         jobs_df['feb'] = jobs_df['estimated_publish_date'] >= "2026-02-01"
-        jobs_df['position'] = (
-            (jobs_df["company_name"].fillna('') + " - " + jobs_df["title"])
-            .str.replace(r"[/|:\\*?]", "_", regex=True)
-            .str.replace('"', "'")
-            .str.replace("’", "'")
-            .str.replace(r" +", " ", regex=True)
-            .str.strip()
-        )
+        jobs_df['position'] = clean_position(jobs_df["company_name"], jobs_df["title"])
 
     return jobs_df
 
-def _norcal_mask(df_lon_lats):
+def sync_jobs(db='jobs.duckdb', workers=None, force=False, stats=None) -> int:
+    """Append jobs that are new or updated in the DuckDB `jobs` table as a parquet part
+
+    Rows are keyed on `requisition_id` and versioned by a hash of the whole row, so only new
+    or changed rows get markdown conversion (cached by HTML hash, misses in a process pool).
+    Parts accumulate in `P_CACHE/{db}_parts/` until `compact_jobs` merges them into
+    `P_CACHE/{db}.parquet`.
+    Skipped when the database is older than the newest parquet, unless `force`.
+    `stats` (dict, optional) is updated with the markdown cache `hits` and `misses`.
+
+    Returns:
+        int: number of rows appended
+    """
+    if isinstance(db, str):
+        db = P_ROOT / db
+    P_parquets = _jobs_parquets(db)
+    if not db.exists():
+        return 0
+    if not force and P_parquets and db.stat().st_mtime <= max(p.stat().st_mtime for p in P_parquets):
+        return 0
+
+    if P_parquets:
+        existing = pa.concat_tables([_read_versions(P) for P in P_parquets])
+    else:
+        existing = pa.table({'requisition_id': pa.array([], pa.string()),
+                             '_version': pa.array([], pa.string())})
+    import duckdb
+
+    with duckdb.connect(db, read_only=True) as con:
+        con.register('existing', existing)
+        jobs_df = con.sql("""
+            SELECT j.* FROM (SELECT *, md5(CAST(jobs AS VARCHAR)) AS _version FROM jobs) j
+            ANTI JOIN existing e ON j.requisition_id = e.requisition_id
+                AND (e._version IS NULL OR j._version = e._version)
+        """).df()
+    if jobs_df.empty:
+        return 0
+
+    jobs_df['_md'] = convert(jobs_df['description'], workers=workers, stats=stats)
+    jobs_df['_url'] = VIEW_JOB_HTTPS + jobs_df['requisition_id']
+    jobs_df['_hash'] = jobs_df['requisition_id']
+
+    P_parts = P_CACHE / f'{db.stem}_parts'
+    P_parts.mkdir(parents=True, exist_ok=True)
+    P_part = P_parts / f'part-{time.time_ns()}.parquet'
+    jobs_df.to_parquet(P_part)
+    print(f'Saving: {P_part} (N={len(jobs_df):,})')
+    return len(jobs_df)
+
+def compact_jobs(db='jobs.duckdb') -> Path:
+    """Merge the base jobs parquet and its appended parts into one file"""
+    if isinstance(db, str):
+        db = P_ROOT / db
+    P_parquet = P_CACHE / f'{db.stem}.parquet'
+    jobs_df = _read_jobs_parquets(db).sort_values('requisition_id', ignore_index=True)
+    P_tmp = P_parquet.with_suffix('.tmp')
+    jobs_df.to_parquet(P_tmp, row_group_size=4096)
+    P_tmp.replace(P_parquet)
+    for P_part in _jobs_parquets(db)[1:]:
+        P_part.unlink()
+    print('Saving:', P_parquet)
+    return P_parquet
+
+def _jobs_parquets(db: Path) -> list[Path]:
+    """Base jobs parquet (if any) followed by appended parts, oldest first"""
+    P_parquet = P_CACHE / f'{db.stem}.parquet'
+    P_parts = sorted((P_CACHE / f'{db.stem}_parts').glob('part-*.parquet'))
+    return [P_parquet, *P_parts] if P_parquet.exists() else P_parts
+
+def _read_versions(P_parquet: Path) -> pa.Table:
+    """`requisition_id` and `_version` (null for parquets written before versioning)"""
+    has_version = '_version' in pq.read_schema(P_parquet).names
+    table = pq.read_table(P_parquet, columns=['requisition_id', *(['_version'] * has_version)])
+    if not has_version:
+        table = table.append_column('_version', pa.nulls(table.num_rows, pa.string()))
+    return table
+
+def _jobs_key(db: Path) -> str:
+    """Version of the jobs parquets (name, size and mtime of each file)"""
+    return '|'.join(f'{P.name}:{P.stat().st_size}:{P.stat().st_mtime_ns}' for P in _jobs_parquets(db))
+
+def _read_jobs_parquets(db: Path, slim=False) -> pd.DataFrame:
+    P_parquets = _jobs_parquets(db)
+    if not P_parquets:
+        raise FileNotFoundError(f'No jobs parquet for {db}')
+    if not slim and len(P_parquets) == 1:
+        return pd.read_parquet(P_parquets[0])
+    tables = []
+    for P in P_parquets:
+        _names = pq.read_schema(P).names
+        tables.append(pq.read_table(P, columns=[c for c in _names if not (slim and c in HEAVY_COLS)]))
+    table = pa.concat_tables(tables, promote_options='permissive')
+    if slim:
+        for col in SLIM_CATEGORIES:
+            if col in table.column_names:
+                _i = table.column_names.index(col)
+                table = table.set_column(_i, col, table.column(col).dictionary_encode())
+    jobs_df = table.to_pandas(types_mapper=_slim_types if slim else None)
+    if len(P_parquets) == 1:
+        return jobs_df
+    return jobs_df.drop_duplicates(subset='requisition_id', keep='last').reset_index(drop=True)
+
+def _slim_types(pa_type: pa.DataType):
+    if pa.types.is_string(pa_type) or pa.types.is_large_string(pa_type):
+        return pd.ArrowDtype(pa_type)
+    return None
+
+def load_heavy(hashes, cols=HEAVY_COLS, db='jobs.duckdb') -> pd.DataFrame:
+    """HEAVY_COLS of `hashes` (indexed by `requisition_id`) read from the jobs parquets
+
+    Parquets are sorted by `requisition_id` on compaction, so row-group statistics skip
+    most of the file.
+    """
+    if isinstance(db, str):
+        db = P_ROOT / db
+    hashes = list(hashes)
+    tables = [
+        pq.read_table(P, columns=['requisition_id', *cols], filters=[('requisition_id', 'in', hashes)])
+        for P in _jobs_parquets(db)
+    ]
+    heavy_df = pa.concat_tables(tables, promote_options='permissive').to_pandas()
+    return heavy_df.drop_duplicates(subset='requisition_id', keep='last').set_index('requisition_id')
+
+## https://en.wikipedia.org/wiki/Module:Location_map/data/San_Francisco_Bay_Area
+# BOTTOM_LAT, TOP_LAT = 37.1897, 38.2033
+# LEFT_LON, RIGHT_LON = -122.6445, -121.5871
+NORCAL_BBOX = (37, 39, -123, -121)  # (bottom lat, top lat, left lon, right lon)
+
+def _norcal_mask(df_lon_lats, bbox=NORCAL_BBOX) -> pd.Series:
+    """Jobs with any location inside `bbox` (flattened lat/lon lists, no explode)"""
     assert 'location_latitudes' in df_lon_lats and 'location_longitudes' in df_lon_lats
-    df_lon_lats = df_lon_lats.reset_index(drop=True)
-    lon_lats = df_lon_lats.explode(['location_latitudes', 'location_longitudes'])[['location_latitudes', 'location_longitudes']].reset_index()
-    ## https://en.wikipedia.org/wiki/Module:Location_map/data/San_Francisco_Bay_Area
-    # BOTTOM_LAT, TOP_LAT = 37.1897, 38.2033
-    # LEFT_LON, RIGHT_LON = -122.6445, -121.5871
-    BOTTOM_LAT, TOP_LAT = 37, 39
-    LEFT_LON, RIGHT_LON = -123, -121
-    lat_mask = (BOTTOM_LAT <= lon_lats['location_latitudes']) & (lon_lats['location_latitudes'] <= TOP_LAT)
-    lon_mask = (LEFT_LON <= lon_lats['location_longitudes']) & (lon_lats['location_longitudes'] <= RIGHT_LON)
-    job_df_bay_area_indices = lon_lats[lat_mask & lon_mask]['index'].drop_duplicates()
-    norcal_mask = pd.Series(True, index=job_df_bay_area_indices).reindex(index=df_lon_lats.index, fill_value=False)
-    return norcal_mask
+    bottom_lat, top_lat, left_lon, right_lon = bbox
+    _lats, _lons = df_lon_lats['location_latitudes'], df_lon_lats['location_longitudes']
+    lengths = _lats.str.len().fillna(0).astype(int).to_numpy()
+    has_loc = lengths > 0
+    if not has_loc.any():
+        return pd.Series(False, index=df_lon_lats.index)
+    lats = np.concatenate(_lats[has_loc].to_numpy()).astype(float)
+    lons = np.concatenate(_lons[has_loc].to_numpy()).astype(float)
+    inside = (bottom_lat <= lats) & (lats <= top_lat) & (left_lon <= lons) & (lons <= right_lon)
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    norcal_mask = np.zeros(len(lengths), dtype=bool)
+    norcal_mask[rows[inside]] = True
+    return pd.Series(norcal_mask, index=df_lon_lats.index)
 
 @cache
-def load_jobs2026(db='jobs.duckdb', clean=True, overwrite=False) -> pd.DataFrame:
-    jobs_df = load_jobs(db, clean, overwrite)
-    jobs2026 = (jobs_df.query('estimated_publish_date >= "2026-01-01"')
-        .sort_values('estimated_publish_date', ascending=False)
-        .reset_index(drop=True))[COLS]
-    jobs2026['estimated_publish_date'] = jobs2026['estimated_publish_date'].dt.tz_localize('UTC')
-    return jobs2026
+def load_jobs2026(db='jobs.duckdb', clean=True, overwrite=False, slim=False) -> pd.DataFrame:
+    return _load_jobs_since('2026-01-01', db, clean, overwrite, slim)
 
 @cache
-def load_jobs_feb(db='jobs.duckdb', clean=True, overwrite=False) -> pd.DataFrame:
-    jobs_df = load_jobs(clean, overwrite)
-    jobs_feb = (jobs_df.query('estimated_publish_date >= "2026-02-01"')
-        .sort_values('estimated_publish_date', ascending=False)
-        .reset_index(drop=True))[COLS]
-    jobs_feb['estimated_publish_date'] = jobs_feb['estimated_publish_date'].dt.tz_localize('UTC')
-    return jobs_feb
+def load_jobs_feb(db='jobs.duckdb', clean=True, overwrite=False, slim=False) -> pd.DataFrame:
+    return _load_jobs_since('2026-02-01', db, clean, overwrite, slim)
+
+def _load_jobs_since(since, db='jobs.duckdb', clean=True, overwrite=False, slim=False) -> pd.DataFrame:
+    cols = COLS if clean else [col for col in COLS if col not in DERIVED_SQL]
+    if slim:
+        # Same rows, order and columns (minus HEAVY_COLS) as `query_jobs` below
+        jobs_df = load_jobs(db, clean, overwrite, slim=True)
+        jobs_df = jobs_df.loc[jobs_df['estimated_publish_date'] >= since,
+                              [col for col in cols if col not in HEAVY_COLS]]
+        jobs_df = jobs_df.sort_values('estimated_publish_date', ascending=False, kind='stable')
+        jobs_df = jobs_df.reset_index(drop=True)
+        jobs_df['estimated_publish_date'] = jobs_df['estimated_publish_date'].dt.tz_localize('UTC')
+        return jobs_df
+    if overwrite:
+        load_jobs(db, clean, overwrite)
+    else:
+        sync_jobs(db)
+    jobs_df = query_jobs(cols, since=since, db=db)
+    jobs_df['estimated_publish_date'] = jobs_df['estimated_publish_date'].dt.tz_localize('UTC')
+    return jobs_df
+
+################################################################################
+# Query layer
+################################################################################
+
+# Derived columns computed in SQL, mirroring the clean step of `load_jobs`
+DERIVED_SQL = {
+    'norcal': (
+        "(coalesce(len(list_filter(list_zip(location_latitudes, location_longitudes),"
+        " x -> x[1] BETWEEN {bottom} AND {top} AND x[2] BETWEEN {left} AND {right})) > 0, false)"
+        " OR coalesce(regexp_matches(formatted_workplace_location,"
+        " 'San Francisco|San Jose', 'i'), false))"
+    ).format_map(dict(zip(['bottom', 'top', 'left', 'right'], NORCAL_BBOX))),
+    'health': (
+        r"coalesce(regexp_matches({company_activities}, '\bhealth|\bmedical|\bbiotech', 'i'),"
+        " false)"
+    ),
+    'jan': "(estimated_publish_date >= TIMESTAMP '2026-01-01')",
+    'feb': "(estimated_publish_date >= TIMESTAMP '2026-02-01')",
+}
+
+def query_jobs(cols=COLS, since=None, until=None, bbox=None, keywords=None,
+               keyword_cols=('_md',), case=False, limit=None, db='jobs.duckdb',
+               sql=False) -> pd.DataFrame | str:
+    """Filter the jobs parquet in DuckDB and return only the matching rows and columns
+
+    Args:
+        cols (list[str]): columns to return; may include the derived `DERIVED_SQL` columns
+        since, until (str): `estimated_publish_date` range (inclusive, exclusive)
+        bbox (tuple): (bottom lat, top lat, left lon, right lon) any job location falls in,
+            e.g. `NORCAL_BBOX`
+        keywords (str | list[str]): regex fragments matched at a word start (as `cmask`),
+            OR-ed together across `keyword_cols`
+        case (bool): case-sensitive keyword match
+        limit (int): maximum rows, newest first
+        sql (bool): return the SQL instead of running it
+
+    Usage:
+    >>> query_jobs(['_hash', 'title'], since='2026-02-01', bbox=NORCAL_BBOX, keywords='dbt')
+    """
+    if isinstance(db, str):
+        db = P_ROOT / db
+    P_parquets = [str(P) for P in _jobs_parquets(db)]
+    if not P_parquets:
+        raise FileNotFoundError(f'No jobs parquet for {db}')
+    schema = pq.read_schema(P_parquets[-1])
+
+    def _as_text(col):
+        is_list = pa.types.is_list(schema.field(col).type) if col in schema.names else False
+        return f"array_to_string({col}, '; ')" if is_list else col
+
+    params = {'files': P_parquets}
+    _select = ', '.join(
+        f"{DERIVED_SQL[col].format(company_activities=_as_text('company_activities'))} AS {col}"
+        if col in DERIVED_SQL and col not in schema.names else col
+        for col in cols
+    )
+    where = ['TRUE']
+    if since is not None:
+        where.append('estimated_publish_date >= CAST($since AS TIMESTAMP)')
+        params['since'] = since
+    if until is not None:
+        where.append('estimated_publish_date < CAST($until AS TIMESTAMP)')
+        params['until'] = until
+    if bbox is not None:
+        where.append(
+            'len(list_filter(list_zip(location_latitudes, location_longitudes),'
+            ' x -> x[1] BETWEEN $bottom AND $top AND x[2] BETWEEN $left AND $right)) > 0'
+        )
+        params.update(zip(['bottom', 'top', 'left', 'right'], bbox))
+    if keywords is not None:
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        params['regex'] = r'\b' + r'|\b'.join(keywords)
+        params['options'] = 'c' if case else 'i'
+        where.append('(' + ' OR '.join(
+            f"coalesce(regexp_matches({_as_text(col)}, $regex, $options), false)"
+            for col in keyword_cols
+        ) + ')')
+
+    _source = "read_parquet($files, union_by_name = true, filename = true)"
+    if len(P_parquets) > 1:
+        # Appended parts supersede earlier rows with the same requisition_id
+        _source = f"""(
+            SELECT * FROM {_source}
+            QUALIFY list_position($files, filename)
+                = max(list_position($files, filename)) OVER (PARTITION BY requisition_id)
+        )"""
+    query = f"""
+        SELECT {_select} FROM {_source}
+        WHERE {' AND '.join(where)}
+        ORDER BY estimated_publish_date DESC
+        {f'LIMIT {int(limit)}' if limit else ''}
+    """
+    if sql:
+        return query
+    import duckdb
+
+    with duckdb.connect() as con:
+        return con.execute(query, params).df()
 
 @cache
 def load_jdf_dict(**kwargs) -> dict[str, pd.DataFrame]:
     jdf_dict = {}
     _query_list = ['ALL', DS_HEALTH, DS_NORCAL]
-    qdict = _load_query_dict()
     for _query in _query_list:
-        _dfs = [load_jdf(path) for path in qdict[_query]]
-        jdf_dict[_query] = pd.concat(_dfs).drop_duplicates(**kwargs).reset_index(drop=True)
+        jdf_dict[_query] = load_jdf_parquet(_query).drop_duplicates(**kwargs).reset_index(drop=True)
     return jdf_dict
 
 def load_pkl(P_pkl):
+    """Load a job's `__NEXT_DATA__` dict by hash (from the job store) or legacy .pkl path"""
     if isinstance(P_pkl, str):
-        path_df = paths_df(P_CACHE / 'dicts', f'*.{P_pkl}.html.pkl')
-        if path_df.empty:
+        job = get_job(P_pkl, fields=('data',))
+        if job is None or job['data'] is None:
             print(f"{P_pkl} not found.")
             raise FileNotFoundError
-        P_pkl = path_df['path'].iloc[0]
+        return job['data']
     with open(P_pkl, 'rb') as f:
         pkl_dict = pickle.load(f)
     return pkl_dict
@@ -126,17 +372,77 @@ def _load_query_dict() -> dict[str, pd.Series]:
     }
     return query_dict
 
-def load_jdf_parquet(query='ALL', overwrite=False, **kwargs):
-    P_parquet = P_CACHE / f"{query}.parquet"
-    if overwrite or not P_parquet.exists():
-        _query_pd_series = _load_query_dict()[query]
-        _dfs = [load_jdf(path) for path in _query_pd_series]
-        query_jdf = pd.concat(_dfs, ignore_index=True)
-        query_jdf.to_parquet(P_parquet)
-        print('Saving:', P_parquet)
-        return query_jdf
-    query_jdf = pd.read_parquet(P_parquet).drop_duplicates(**kwargs)
-    return query_jdf
+JDF_CATEGORIES = ['company', 'location']
+
+def load_jdf_parquet(query='ALL', overwrite=False, workers=None, **kwargs) -> pd.DataFrame:
+    """Job cards of every snapshot of `query` from the partitioned parquet dataset
+
+    Snapshots that are new since the last call are parsed first (see `ingest_snapshots`).
+    Rows carry their `date` and `query` partition values.
+    """
+    ingest_snapshots(query, overwrite=overwrite, workers=workers)
+    _paths = sorted(P_JDF.glob('date=*/query=*/part-0.parquet'))
+    if query != 'ALL':
+        _paths = [path for path in _paths if path.parent.name == f'query={query}']
+    if not _paths:
+        return pd.DataFrame()
+    tables = []
+    for path in _paths:
+        table = pq.read_table(path)
+        for partition in (path.parents[1].name, path.parent.name):
+            key, value = partition.split('=', 1)
+            table = table.append_column(key, pa.array([value] * table.num_rows, pa.string()))
+        tables.append(_decode_dictionaries(table))
+    query_jdf = pa.concat_tables(tables, promote_options='permissive').to_pandas()
+    query_jdf[JDF_CATEGORIES] = query_jdf[JDF_CATEGORIES].astype('category')
+    return query_jdf.drop_duplicates(**kwargs) if kwargs else query_jdf
+
+def _decode_dictionaries(table: pa.Table) -> pa.Table:
+    """Categorical columns as plain strings, so partitions written before and after they
+    became categorical concatenate"""
+    fields = [field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+              for field in table.schema]
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+def ingest_snapshots(query='ALL', overwrite=False, workers=None, since=None) -> list[Path]:
+    """Parse snapshots of `query` under P_PROCESSED into P_JDF in a process pool
+
+    Each snapshot `{date}/{query}/{query}.html` is written to
+    `P_JDF/date={date}/query={query}/part-0.parquet`. Snapshots whose partition is newer than
+    the HTML are skipped unless `overwrite`, and snapshots dated before `since` (YYYY-MM-DD)
+    are skipped.
+
+    Returns:
+        list[Path]: partitions written by this call
+    """
+    _glob = '*/*/*.html' if query == 'ALL' else f'*/{query}/{query}.html'
+    todo = []
+    for P_html in P_PROCESSED.glob(_glob):
+        if P_html.stem != P_html.parent.name or (since and P_html.parents[1].name < since):
+            continue
+        P_part = _partition_path(P_html)
+        if overwrite or not P_part.exists() or P_part.stat().st_mtime < P_html.stat().st_mtime:
+            todo.append(P_html)
+    if not todo:
+        return []
+    print(f'Ingesting {len(todo)} snapshots into {P_JDF}...')
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_ingest_snapshot, todo, chunksize=4))
+
+def _partition_path(P_html: Path) -> Path:
+    _date = P_html.parents[1].name
+    return P_JDF / f'date={_date}' / f'query={P_html.stem}' / 'part-0.parquet'
+
+def _ingest_snapshot(P_html: Path) -> Path:
+    P_part = _partition_path(P_html)
+    from job_search.dataset import load_jdf
+
+    P_part.parent.mkdir(parents=True, exist_ok=True)
+    jdf = load_jdf(P_html)
+    P_tmp = P_part.with_suffix('.tmp')
+    pq.write_table(pa.Table.from_pandas(jdf, preserve_index=False), P_tmp)
+    P_tmp.replace(P_part)
+    return P_part
 
 
 ################################################################################
@@ -144,6 +450,8 @@ def load_jdf_parquet(query='ALL', overwrite=False, **kwargs):
 HASH = "lt3eeomecenp5t50"
 
 def display_text_mask(keywords, job_ii=1, job_df=None, llm=False):
+    from IPython.display import display
+
     if job_df is None:
         job_df = load_jobs()
     _mask = text_mask(keywords, job_df=job_df)
@@ -159,6 +467,8 @@ def display_text_mask(keywords, job_ii=1, job_df=None, llm=False):
         print(f'No match for: {keywords}')
 
 def disp(jobs_df=None, mask=None, ii=0, llm=False, **kwargs):
+    from IPython.display import display
+
     if jobs_df is None:
         jobs_df = load_jobs()
     if mask is None:
@@ -183,6 +493,8 @@ def disp(jobs_df=None, mask=None, ii=0, llm=False, **kwargs):
         print('No match')
 
 def display_cmask(keywords, job_ii=1, llm=False):
+    from IPython.display import display
+
     job_df = load_jobs()
     _mask = cmask(keywords)
     if len(job_df) == 0:
@@ -202,41 +514,84 @@ def display_ai(_hash=HASH, job_df=None):
     return display_job(_hash=HASH, job_df=None, llm=True)
 
 def display_job(_hash=HASH, job_df=None, llm=False):
+    from IPython.display import display
+
     if job_df is None:
         job_df = load_jobs()
-    job_md = hash2md(_hash)
+    job_md = hash2md(_hash, job_df=job_df)
     if llm:
+        from job_search.ai import llm_extract
+
         llm_extract(job_md, verbose=True)
-    display(job_df.query('_hash == @_hash')[COLS].drop(columns=['_md', 'description']).T.style)
-    display_hash(_hash)
-
-def display_hash(_hash=HASH, verbose=True):
-    jobs_df = load_jobs()
-    _row = jobs_df.query(f'requisition_id == "{_hash}"')
-    _md = _row['_md'].iloc[0]
-    _technical_tools = _row['technical_tools'].iloc[0]
-    _replace_list = [*_technical_tools, 'AI']
-    for tool in _replace_list:
-        _md = re.sub(rf"\b{tool}\b", f'<span style="color: rebeccapurple">{tool}</span>', _md)
+    display(get_many([_hash], job_df)[COLS].drop(columns=['_md', 'description']).T.style)
+    display_hash(_hash, job_df=job_df)
+
+def display_hash(_hash=HASH, verbose=True, job_df=None):
+    _row = get_job_row(_hash, job_df)
+    _md = _row['_md']
+    _technical_tools = _row['technical_tools']
+    _md = highlight(_md, [*_technical_tools, 'AI'])
     return _display_md(_md, verbose=verbose)
 
 def _display_md(_md, verbose=True):
     if verbose:
+        from IPython.display import Markdown, display
+
         _markdown = f'<div style="font-size:16px;max-width:45rem;margin:0 auto;">{str(_md)}</div>'
         return display(Markdown(_markdown))
     print(_md)
 
-def hash2md(hash, verbose=False):
-    _jobs_df = load_jobs()
-    _md = _jobs_df.query('requisition_id==@hash')['_md'].iloc[0]
+def hash2md(hash, verbose=False, job_df=None):
+    _md = get_job_row(hash, job_df)['_md']
     if verbose:
         return print(_md)
     return _md
 
+_HASH_INDEXES: dict[int, tuple[weakref.ref, pd.Index]] = {}
+
+def hash_index(job_df=None) -> pd.Index:
+    """`_hash` -> row position lookup, built once per frame"""
+    if job_df is None:
+        job_df = load_jobs()
+    key = id(job_df)
+    if key in _HASH_INDEXES:
+        ref, index = _HASH_INDEXES[key]
+        if ref() is job_df and len(index) == len(job_df):
+            return index
+    index = pd.Index(job_df['_hash'])
+    _HASH_INDEXES[key] = (weakref.ref(job_df, lambda _: _HASH_INDEXES.pop(key, None)), index)
+    return index
+
+def get_many(hashes, job_df=None) -> pd.DataFrame:
+    """Rows of `job_df` for `hashes` in the given order (unknown hashes are skipped)
+
+    HEAVY_COLS missing from a slim frame are read for just these rows.
+    """
+    if job_df is None:
+        job_df = load_jobs()
+    positions = hash_index(job_df).get_indexer_for(list(hashes))
+    return with_heavy(job_df.take(positions[positions >= 0]))
+
+def with_heavy(job_df: pd.DataFrame, cols=HEAVY_COLS) -> pd.DataFrame:
+    """`job_df` with the HEAVY_COLS among `cols` it lacks read from disk for its rows"""
+    missing = [col for col in cols if col in HEAVY_COLS and col not in job_df]
+    if not missing or not len(job_df):
+        return job_df
+    heavy_df = load_heavy(job_df['requisition_id'].unique(), missing)
+    return job_df.assign(**{col: job_df['requisition_id'].map(heavy_df[col]) for col in missing})
+
+def get_job_row(hash, job_df=None) -> pd.Series:
+    _rows = get_many([hash], job_df)
+    if _rows.empty:
+        raise KeyError(f'Unknown job hash: {hash}')
+    return _rows.iloc[0]
+
 # @cache
 def _load_text(job_df=None) -> pd.Series:
     if job_df is None:
-        job_df = load_jobs()
+        job_df = load_jobs(slim=True)
+    # object columns: categorical and Arrow columns of a slim frame don't concatenate
+    job_df = with_heavy(job_df, ['_md'])[TEXT_COLS].astype(object)
     pd_series = (job_df['company_name'].fillna('') + ' - ' + job_df['title'] + '.' + job_df['_hash'] + '\n\n'
         + job_df['requirements_summary'] + '\n\n'
         + job_df['technical_tools'].str.join('; ') + '\n'
@@ -250,7 +605,15 @@ def _load_text(job_df=None) -> pd.Series:
     return pd_series
 
 def text_mask(phrase, job_df=None, regex=False, verbose=False, **kwargs):
-    """General search with regex"""
+    """General search with regex (plain lowercase phrases are answered by the keyword index)"""
+    if not regex and phrase == phrase.lower() and is_plain(phrase):
+        if job_df is None:
+            job_df = load_jobs(slim=True)
+        index = load_index()
+        _mask = job_df['_hash'].isin(index.hashes[index.keyword(phrase, TEXT_COLS)])
+        if verbose:
+            return _mask.pipe(perc, **kwargs)
+        return _mask
     pd_series = _load_text(job_df)
     return rmask(phrase, pd_series, regex, verbose, **kwargs)
 
@@ -270,13 +633,8 @@ def rmask(phrase, pd_series=None, regex=False, verbose=False, **kwargs):
 
 def tmask(phrase, pd_series=None, regex=False, verbose=False, **kwargs):
     """Mask on technical tools"""
-    if pd_series is None:
-        pd_series = load_jobs()['technical_tools']
-    lower = phrase == phrase.lower()
-    if lower:
-        phrase = phrase.lower()
-        pd_series = pd_series.apply(lambda x_list: [x.lower() for x in x_list])
-    _mask = pd_series.apply(lambda x_list: any(bool(re.match(phrase, x)) for x in x_list))
+    tools = load_tools() if pd_series is None else ToolIndex.build(pd_series)
+    _mask = pd.Series(tools.match(phrase), index=tools.index)
     if verbose:
         return _mask.pipe(perc, **kwargs)
     return _mask
@@ -284,15 +642,26 @@ def tmask(phrase, pd_series=None, regex=False, verbose=False, **kwargs):
 def hmask(phrase, pd_df=None, regex=False):
     if pd_df is None:
         pd_df = load_jobs()
+    if not regex and phrase == phrase.lower() and is_plain(phrase):
+        index = load_index()
+        return index.mask(index.keyword(phrase, TEXT_COLS)).to_hashes() & set(pd_df['_hash'])
     _mask = text_mask(phrase, job_df=pd_df, regex=False)
     hash_set = set(pd_df[_mask]['_hash'])
     return hash_set
 
-def perc(pd_series: pd.Series, caption='', display_false=False):
+@cache
+def load_tools(col='technical_tools') -> ToolIndex:
+    """Dictionary-encoded `col` of `load_jobs()`"""
+    return ToolIndex.build(load_jobs()[col])
+
+def tool_counts(col='technical_tools', lower=True) -> pd.Series:
+    return load_tools(col).counts(lower=lower)
+
+def perc(pd_series: pd.Series | Mask, caption='', display_false=False):
     """Display percentage
 
     Args:
-        pd_series (pd.Series): Input values
+        pd_series (pd.Series | Mask): Input values
         caption (str, optional): Caption. Defaults to ''.
         display_false (bool, optional): Display percentage of False values. Defaults to False.
 
@@ -300,7 +669,11 @@ def perc(pd_series: pd.Series, caption='', display_false=False):
         pd.DataFrame: Displayed percentage
     """
     # df = pd.value_counts(pd_series).to_frame().T
-    df = pd_series.value_counts().to_frame().T
+    if isinstance(pd_series, Mask):
+        n_true = pd_series.count()
+        df = pd.DataFrame({True: [n_true], False: [len(pd_series) - n_true]})
+    else:
+        df = pd_series.value_counts().to_frame().T
     if True not in df:
         df[True] = 0
     if False not in df:
@@ -317,6 +690,56 @@ def perc(pd_series: pd.Series, caption='', display_false=False):
         styled_df = styled_df.set_caption(caption)  # ty:ignore[unresolved-attribute]
     return styled_df
 
+################################################################################
+# Keyword index
+################################################################################
+
+@cache
+def load_index(overwrite=False) -> JobIndex:
+    """Inverted keyword index over MASK_COLS, saved next to the jobs parquet
+
+    Rows follow `load_jobs(clean=False)`; the index is rebuilt when the parquets change. Only
+    a rebuild reads HEAVY_COLS in full; phrase matches read them for candidate rows.
+    """
+    db = P_ROOT / 'jobs.duckdb'
+    jobs_df = load_jobs(clean=False, slim=True)
+    P_index = P_CACHE / f'{db.stem}_index.npz'
+    key = _jobs_key(db)
+    if P_index.exists() and not overwrite:
+        index = JobIndex.load(P_index)
+        if index.key == key and index.n == len(jobs_df):
+            return index.attach(jobs_df, load_heavy)
+    index = JobIndex.build(with_heavy(jobs_df, MASK_COLS), MASK_COLS, key)
+    index.save(P_index)
+    print('Saving:', P_index)
+    return index.attach(jobs_df, load_heavy)
+
+NAMED_MASKS = ['norcal', 'health', 'jan', 'feb']
+
+@cache
+def load_masks(overwrite=False) -> dict[str, Mask]:
+    """NAMED_MASKS of the clean frame as `Mask`s over the index rows, saved per corpus version"""
+    index = load_index()
+    P_masks = P_CACHE / 'jobs_masks.npz'
+    if P_masks.exists() and not overwrite:
+        with np.load(P_masks) as npz:
+            if str(npz['key']) == index.key and set(NAMED_MASKS) <= set(npz.files):
+                return {name: Mask(npz[name], index.universe) for name in NAMED_MASKS}
+    jobs_df = load_jobs(slim=True)
+    masks = {name: Mask.from_series(jobs_df[name], jobs_df['_hash'], index.universe)
+             for name in NAMED_MASKS}
+    with open(P_masks, 'wb') as f:
+        np.savez(f, key=np.array(index.key), **{name: mask.bits for name, mask in masks.items()})
+    return masks
+
+def bmask(query, cols=MASK_COLS) -> Mask:
+    """Boolean keyword query (AND/OR/NOT, "phrases") as a `Mask`; names in NAMED_MASKS
+    refer to the precomputed masks
+
+    >>> bmask('python AND norcal AND NOT health').count()
+    """
+    return load_index().search(query, cols, named=load_masks())
+
 ################################################################################
 # Company Activities
 ################################################################################
@@ -328,32 +751,41 @@ COL = '_md'
 def _cmask(keywords, contains=True, case=None, col=COL):
     if not isinstance(keywords, (list, tuple)):
         keywords = [keywords]
-    jobs_df = load_jobs(clean=False)
+    jobs_df = with_heavy(load_jobs(clean=False, slim=True), [col])
 
     regex = r'\b' + r"|\b".join(keywords)
     if case is None:
         case = (regex != regex.lower())
-    if not case:
-        keywords = tuple(k.lower() for k in keywords)
-
-    def _set_match(x_list, case):
-        x_set = set([x.lower() for x in x_list]) if case else set(x_list)
-        return bool(set(keywords) & x_set)
 
-    jobs_df_col = jobs_df[col].apply(lambda x: [x] if isinstance(x, str) else x)
     if contains:
-        mask = jobs_df_col.str.join('; ').str.contains(regex, case=case, na=False)
-    else:
-        mask = jobs_df_col.apply(_set_match, case=case)
-    return mask
+        return _contains_mask(jobs_df[col], keywords, case)
+    jobs_df_col = jobs_df[col].apply(lambda x: [x] if isinstance(x, str) else x)
+    return pd.Series(ToolIndex.build(jobs_df_col).isin(keywords, case), index=jobs_df.index)
+
+def _contains_mask(pd_series: pd.Series, keywords, case=False) -> pd.Series:
+    """`\\b{keyword}` regex search over a string or list column (lists joined with "; ")"""
+    regex = r'\b' + r"|\b".join(keywords)
+    _texts = pd_series.astype(object).apply(lambda x: [x] if isinstance(x, str) else x).str.join('; ')
+    return _texts.str.contains(regex, case=case, na=False)
 
 def _chashes(keywords, contains=True, case=False, col=COL):
-    mask = _cmask(keywords, contains, case, col)
-    jobs_df = load_jobs(clean=False)
+    if _indexable(keywords, contains, case, col):
+        index = load_index()
+        cols = list(col) if isinstance(col, (list, tuple)) else [col]
+        return index.mask(index.any_of(keywords, cols)).to_hashes()
+    mask = cmask(keywords, contains, case, col)
+    jobs_df = load_jobs(clean=False, slim=True)
     hashes = jobs_df[mask]['_hash'].pipe(set)
     return hashes
 
 def cmask(keywords, contains=True, case=False, col=MASK_COLS):
+    if not isinstance(keywords, (list, tuple)):
+        keywords = [keywords]
+    if _indexable(keywords, contains, case, col):
+        index = load_index()
+        cols = list(col) if isinstance(col, (list, tuple)) else [col]
+        jobs_df = load_jobs(clean=False, slim=True)
+        return pd.Series(index.any_of(keywords, cols), index=jobs_df.index)
     if isinstance(col, (list, tuple)):
         masks_list = [cmask(keywords, contains, case, c) for c in col]
         mask = reduce(lambda x, y: x|y, masks_list)
@@ -364,6 +796,11 @@ def cmask(keywords, contains=True, case=False, col=MASK_COLS):
     mask = _cmask(keywords, contains, case, col)
     return mask
 
+def _indexable(keywords, contains, case, col) -> bool:
+    cols = col if isinstance(col, (list, tuple)) else [col]
+    return (contains and not case and all(c in MASK_COLS for c in cols)
+            and all(is_plain(k) for k in keywords))
+
 def chashes(keywords, contains=True, case=False, jobs_df=None, col=MASK_COLS):
     if not isinstance(keywords, (list, tuple)):
         keywords = [keywords]
@@ -0,0 +1,126 @@
+"""
+Cached HTML -> markdown conversion
+
+`markdownify` is the most expensive step of a jobs rebuild. Results are keyed by a hash
+of the HTML (and conversion options) in an SQLite file, and misses are converted in a
+process pool in chunked batches.
+
+Usage:
+>>> from job_search.mdconvert import convert, convert_one
+>>> jobs_df['_md'] = convert(jobs_df['description'], workers=8)
+>>> convert_one(html, heading_style='ATX', clean=True)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+import hashlib
+from pathlib import Path
+import sqlite3
+import threading
+import zlib
+
+from job_search.config import P_MD_CACHE
+
+# Characters normalized in job descriptions (non-breaking/zero-width spaces, curly quote)
+MD_TRANSLATE = str.maketrans({"\xa0": " ", "\u200b": " ", "\u202f": " ", "’": "'"})
+CHUNKSIZE = 64
+_CHUNK = 900  # stay under SQLite's bound-parameter limit
+_lock = threading.Lock()
+
+
+def clean_md(text: str) -> str:
+    return text.translate(MD_TRANSLATE)
+
+
+@cache
+def connect(path: Path = P_MD_CACHE) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(path, check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("CREATE TABLE IF NOT EXISTS md (key TEXT PRIMARY KEY, md BLOB)")
+    return con
+
+
+def _key(html: str, heading_style, clean: bool) -> str:
+    _options = f"{heading_style}|{int(clean)}|".encode()
+    return hashlib.blake2b(_options + html.encode(), digest_size=16).hexdigest()
+
+
+def _markdownify(html: str, heading_style=None, clean=False) -> str:
+    from markdownify import markdownify as md
+
+    text = md(html) if heading_style is None else md(html, heading_style=heading_style)
+    return clean_md(text) if clean else text
+
+
+def _markdownify_chunk(htmls: list[str], heading_style=None, clean=False) -> list[str]:
+    return [_markdownify(html, heading_style, clean) for html in htmls]
+
+
+def _lookup(keys: list[str], path: Path) -> dict[str, str]:
+    con = connect(path)
+    found = {}
+    for i in range(0, len(keys), _CHUNK):
+        chunk = keys[i : i + _CHUNK]
+        _select = f"SELECT key, md FROM md WHERE key IN ({', '.join('?' * len(chunk))})"
+        found.update((key, zlib.decompress(blob).decode()) for key, blob in con.execute(_select, chunk))
+    return found
+
+
+def _save(results: dict[str, str], path: Path):
+    con = connect(path)
+    with _lock, con:
+        con.executemany(
+            "INSERT OR REPLACE INTO md VALUES (?, ?)",
+            ((key, zlib.compress(text.encode(), 6)) for key, text in results.items()),
+        )
+
+
+def convert(
+    htmls,
+    heading_style=None,
+    clean=False,
+    workers=None,
+    chunksize=CHUNKSIZE,
+    path: Path = P_MD_CACHE,
+    stats: dict | None = None,
+) -> list[str | None]:
+    """Markdown for each HTML string (None stays None), converting only cache misses
+
+    Args:
+        htmls (Iterable[str | None]): HTML documents
+        heading_style (str, optional): `markdownify` heading style (default: underlined)
+        clean (bool): normalize characters with MD_TRANSLATE
+        workers (int, optional): process pool size for misses (1 converts inline)
+        chunksize (int): documents per pool task
+        stats (dict, optional): updated with `hits` and `misses`
+    """
+    htmls = list(htmls)
+    keys = [None if html is None else _key(html, heading_style, clean) for html in htmls]
+    todo = dict(zip(keys, htmls))
+    todo.pop(None, None)
+    results = _lookup(list(todo), path)
+    misses = {key: html for key, html in todo.items() if key not in results}
+
+    if misses:
+        chunks = [list(misses.values())[i : i + chunksize] for i in range(0, len(misses), chunksize)]
+        if workers == 1 or len(chunks) == 1:
+            converted = [_markdownify_chunk(chunk, heading_style, clean) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                converted = list(executor.map(
+                    _markdownify_chunk, chunks, [heading_style] * len(chunks), [clean] * len(chunks)
+                ))
+        new = dict(zip(misses, (text for chunk in converted for text in chunk)))
+        _save(new, path)
+        results.update(new)
+    if stats is not None:
+        stats["hits"] = stats.get("hits", 0) + len(todo) - len(misses)
+        stats["misses"] = stats.get("misses", 0) + len(misses)
+    return [None if key is None else results[key] for key in keys]
+
+
+def convert_one(html: str, heading_style=None, clean=False, path: Path = P_MD_CACHE) -> str:
+    """`convert` for a single document, without a process pool"""
+    return convert([html], heading_style, clean, workers=1, path=path)[0]
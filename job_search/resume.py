@@ -5,28 +5,80 @@ Usage:
 >>> import resume as res
 >>> P_resume = "Alexander_Wu_Resume.md"
 >>> convert_resume(P_resume)
+>>> convert_resumes(P_INTERIM.glob('AW_*_Resume.md'))  # one LibreOffice call for all
 """
-from functools import cache
+from functools import cache, lru_cache
+import io
 from pathlib import Path
+import re
+import subprocess
 
 import docx
 from docx.document import Document
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING, WD_TAB_ALIGNMENT
 from docx.oxml import OxmlElement, ns
 from docx.shared import Inches, Pt, RGBColor
 import docx2pdf  # noqa: F401
 from markdown_it import MarkdownIt
 from mdit_py_plugins.front_matter import front_matter_plugin
+import numpy as np
 import pandas as pd
 
 from job_search.config import P_INTERIM, P_PROCESSED, P_RAW
 
 P_ALEX_RESUME_MD = Path('data/Alexander_Wu_Resume.md')
+BOLD_RUN_RE = re.compile(r'(.+?\*\*.+?\*\*)')
 
 
 def convert_markdown(path_md: Path | str, keep_docx=True, resume=False, pagebreak=False, verbose=True):
     P_md = Path(path_md)
-    mdf = analyze(P_md, explode=True)
+    document = build_document(P_md, resume=resume, pagebreak=pagebreak)
+
+    P_docx = P_md.parent / f"{P_md.stem}"
+    # P_docx = Path('data/_') / f"{P_md.stem}"
+    if verbose:
+        print(f'Saving to {P_docx}.docx')
+    document.save(f'{P_docx}.docx')
+    convert_pdf(document, P_docx, keep_docx=keep_docx)
+
+
+def convert_resume(path_md: Path | str = P_ALEX_RESUME_MD, keep_docx=False, pagebreak=False, verbose=True):
+    convert_markdown(path_md, keep_docx, resume=True, pagebreak=pagebreak, verbose=verbose)
+
+
+def convert_markdowns(paths, keep_docx=False, resume=False, pagebreak=False, verbose=True) -> list[Path]:
+    """`convert_markdown` for many files: DOCX files are built from the cached base document
+    and converted to PDF by a single LibreOffice process
+
+    Returns:
+        list[Path]: PDFs under P_PROCESSED that were produced; DOCX files of failed
+            conversions are kept
+    """
+    P_docx_list = []
+    for path_md in paths:
+        P_md = Path(path_md)
+        P_docx = P_md.parent / f"{P_md.stem}.docx"
+        build_document(P_md, resume=resume, pagebreak=pagebreak).save(P_docx)
+        P_docx_list.append(P_docx)
+    if verbose:
+        print(f'Converting {len(P_docx_list)} files to PDF...')
+    P_pdf_list = convert_pdfs(P_docx_list)
+    if not keep_docx:
+        _converted = {P_pdf.stem for P_pdf in P_pdf_list}
+        for P_docx in P_docx_list:
+            if P_docx.stem in _converted:
+                P_docx.unlink()
+    return P_pdf_list
+
+
+def convert_resumes(paths, keep_docx=False, pagebreak=False, verbose=True) -> list[Path]:
+    return convert_markdowns(paths, keep_docx, resume=True, pagebreak=pagebreak, verbose=verbose)
+
+
+def build_document(path_md: Path | str, resume=False, pagebreak=False) -> Document:
+    """DOCX document for a markdown file, starting from the cached styled base document"""
+    mdf = analyze(Path(path_md), explode=True)
     mdf['_style'] = 'Normal'
     mdf.loc[lambda x: (x['_tag'] == 'h2') & (x['_i'] == 0), '_style'] = 'Heading 2'
     mdf.loc[lambda x: x['_tag'].isin(['ul', 'li']) & (x['_i'] == 0), '_style'] = 'List Bullet'
@@ -41,53 +93,88 @@ def convert_markdown(path_md: Path | str, keep_docx=True, resume=False, pagebrea
         mdf.loc[0, '_style'] = 'title'
         mdf.loc[1, '_style'] = 'subtitle'
         mdf.loc[3, '_style'] = 'Heading 2'
-    _bullets = (' ' + mdf['_condensed']).str.extractall(r'(.+?\*\*.+?\*\*)').groupby(level=0)[0].apply(list)
-    _bullets = _bullets.reindex_like(mdf).apply(lambda x: x if isinstance(x, list) else [])
-    _last_item = ('**' + mdf['_condensed']).str.split('**', regex=False).str[-1]
-    mdf['_runs'] = _bullets + _last_item.fillna('').apply(lambda x: [x])
+    # runs: "normal **bold**" pieces, then the text after the last bold (the regex backtracks
+    # quadratically on lines without bold, so only run it where a bold pair can match)
+    mdf['_runs'] = [
+        [''] if line is None
+        else (BOLD_RUN_RE.findall(' ' + line) if line.count('**') >= 2 else []) + [line.rsplit('**', 1)[-1]]
+        for line in mdf['_condensed']
+    ]
+
+    document = _new_document(header=resume)
+    _rows = mdf.dropna(subset='_condensed')
+    for runs, style in zip(_rows['_runs'], _rows['_style']):
+        # _string = ''.join(runs).strip()
+        # print(f" {style:12} - {runs} =={_string}==")
+        _add_paragraph(document, runs, style, style_id=lambda x: _style_id(x, resume))
+    return document
+
 
+@cache
+def _base_document(header=True) -> bytes:
+    """Empty document with `_init_document` styles applied, saved once"""
     document = docx.Document()
-    _init_document(document, header=resume)
+    _init_document(document, header=header)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
 
-    for _, row in mdf.dropna(subset='_condensed').iterrows():
-        # _string = ''.join(row['_runs']).strip()
-        # print(f" {row['_line']:2}: {row['_style']:12} - {row['_runs']} =={_string}==")
-        _add_paragraph(document, row['_runs'], row['_style'])
 
-    P_docx = P_md.parent / f"{P_md.stem}"
-    # P_docx = Path('data/_') / f"{P_md.stem}"
-    if verbose:
-        print(f'Saving to {P_docx}.docx')
-    document.save(f'{P_docx}.docx')
-    convert_pdf(document, P_docx, keep_docx=keep_docx)
+def _new_document(header=True) -> Document:
+    return docx.Document(io.BytesIO(_base_document(header)))
 
 
-def convert_resume(path_md: Path | str = P_ALEX_RESUME_MD, keep_docx=False, pagebreak=False, verbose=True):
-    convert_markdown(path_md, keep_docx, resume=True, pagebreak=pagebreak, verbose=verbose)
+@cache
+def _style_id(style: str, header=True) -> str | None:
+    """Paragraph style id in the base document (None for the default style); resolving a
+    style by name scans every style in the document, so look each name up once
+    """
+    return _new_document(header).part.get_style_id(style, WD_STYLE_TYPE.PARAGRAPH)
 
 
-@cache
 def analyze(path_md: Path | str = P_ALEX_RESUME_MD, explode=True) -> pd.DataFrame:
     """
+    Cached on (path, mtime, size), so edits to the file are picked up on the next call
+
     Returns:
         mdf (pd.DataFrame): markdown dataframe representation
     """
+    P_md = Path(path_md).resolve()
+    _stat = P_md.stat()
+    return _analyze(P_md, _stat.st_mtime_ns, _stat.st_size, explode).copy()
+
+
+@lru_cache(maxsize=64)
+def _analyze(P_md: Path, mtime_ns: int, size: int, explode=True) -> pd.DataFrame:
     _md = MarkdownIt('commonmark', {'breaks': True, 'html': True}).use(front_matter_plugin)
-    with open(path_md, encoding='utf-8') as f:
+    with open(P_md, encoding='utf-8') as f:
         # _md_text = f.read()
         _md_lines = f.readlines()
         _md_text = ''.join([line for line in _md_lines if not line.startswith("<!--")])
         tokens = _md.parse(_md_text)
 
-    tdf = pd.DataFrame(tokens)
-    tdf['_begin'] = tdf['map'].ffill().str[0]
-
-    mdf = tdf.groupby('_begin').agg(
-        _len=('_begin', len),  # pl.len(),
-        _tag=('tag', 'last'),  # pl.col('tag').last(),
-        markup=('markup', 'first'),  # pl.col('markup').first(),
-        content=('content', ''.join),  # pl.col('content').implode().list.join(''),
-    ).reset_index()
+    # one row per source line that opens a block: tokens without a `map` belong to the last block
+    lines = {}
+    _begin = None
+    for token in tokens:
+        if token.map is not None:
+            _begin = token.map[0]
+        if _begin is None:
+            continue
+        if _begin not in lines:
+            lines[_begin] = [0, token.tag, token.markup, []]
+        line = lines[_begin]
+        line[0] += 1
+        line[1] = token.tag
+        line[3].append(token.content)
+    _begins = sorted(lines)
+    mdf = pd.DataFrame({
+        '_begin': pd.Series(_begins, dtype='int64'),
+        '_len': pd.Series([lines[i][0] for i in _begins], dtype='int64'),
+        '_tag': [lines[i][1] for i in _begins],
+        'markup': [lines[i][2] for i in _begins],
+        'content': [''.join(lines[i][3]) for i in _begins],
+    })
     # mdf['_tag'] = mdf['_tag'] + (mdf['_tag'] == mdf['_tag'].shift(-1)).map({True: '_', False: ''})
     mdf['_ul_next'] = mdf['_tag'].shift(-1).isin(['ul', 'li'])
 
@@ -99,18 +186,33 @@ def analyze(path_md: Path | str = P_ALEX_RESUME_MD, explode=True) -> pd.DataFram
     mdf['_condensed'] = _condensed_line.str.split('\n')
 
     if explode:
-        md_df = mdf.explode('_markdown').drop(columns='content').reset_index(drop=True)
-        md_df['_line'] = 1 + md_df['_begin'] + md_df.groupby('_begin').cumcount()
-        md_df['_i'] = md_df.groupby('_begin').cumcount()
-        md_df['_condensed'] = md_df.apply(lambda x: x['_condensed'][x['_i']] if x['_i'] < len(x['_condensed']) else None, axis=1)
-        return md_df
+        return _explode(mdf)
     return mdf
 
 
+def _explode(mdf: pd.DataFrame) -> pd.DataFrame:
+    """One row per markdown line: `_i`-th piece of `_markdown` and `_condensed` (None past its end)"""
+    _lens = mdf['_markdown'].str.len().to_numpy()
+    _rows = np.repeat(np.arange(len(mdf)), _lens)
+    _i = np.arange(len(_rows)) - np.repeat(np.cumsum(_lens) - _lens, _lens)
+
+    _condensed_lens = mdf['_condensed'].str.len().to_numpy()
+    _condensed_flat = np.empty(_condensed_lens.sum(), dtype=object)
+    _condensed_flat[:] = [piece for pieces in mdf['_condensed'] for piece in pieces]
+    _valid = _i < _condensed_lens[_rows]
+    _condensed = np.full(len(_rows), None, dtype=object)
+    _condensed[_valid] = _condensed_flat[(np.cumsum(_condensed_lens) - _condensed_lens)[_rows] + _i][_valid]
+
+    md_df = mdf.drop(columns=['content', '_markdown', '_condensed']).iloc[_rows].reset_index(drop=True)
+    md_df.insert(md_df.columns.get_loc('_ul_next') + 1, '_markdown', [piece for pieces in mdf['_markdown'] for piece in pieces])
+    md_df.insert(md_df.columns.get_loc('_markdown') + 1, '_condensed', _condensed)
+    md_df['_line'] = 1 + md_df['_begin'] + _i
+    md_df['_i'] = _i
+    return md_df
+
+
 def convert_pdf(document: Document, name: Path | str, keep_docx=False):
     """Converts a DOCX file to PDF using LibreOffice command line."""
-    import subprocess
-
     # docx2pdf.convert(f'{name}.docx', f'{name}.pdf')
     P_name = Path(name)
     try:
@@ -130,6 +232,32 @@ def convert_pdf(document: Document, name: Path | str, keep_docx=False):
         Path(f'{P_name}.docx').unlink()
 
 
+def convert_pdfs(P_docx_list, outdir: Path = P_PROCESSED) -> list[Path]:
+    """Convert DOCX files to PDF in one LibreOffice process (one cold start for all files)
+
+    Returns:
+        list[Path]: PDFs written by this call (failed files are reported and left out)
+    """
+    P_docx_list = [Path(P) for P in P_docx_list]
+    if not P_docx_list:
+        return []
+    P_pdf_list = [outdir / f"{P.stem}.pdf" for P in P_docx_list]
+    _mtimes = {P_pdf: P_pdf.stat().st_mtime_ns for P_pdf in P_pdf_list if P_pdf.exists()}
+    command = ["swriter", "--headless", "--convert-to", "pdf", "--outdir", str(outdir), *map(str, P_docx_list)]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Error during conversion: {e.stderr.decode()}")
+    except FileNotFoundError:
+        print("LibreOffice not found. Make sure it is installed and in your PATH.")
+    P_done = [P_pdf for P_pdf in P_pdf_list
+              if P_pdf.exists() and P_pdf.stat().st_mtime_ns != _mtimes.get(P_pdf)]
+    if len(P_done) < len(P_pdf_list):
+        _failed = sorted({P.name for P in P_pdf_list} - {P.name for P in P_done})
+        print(f"Failed to convert {len(_failed)} of {len(P_pdf_list)} files: {', '.join(_failed)}")
+    return P_done
+
+
 def _init_document(document, header=True):
     section = document.sections[0]
     section.top_margin = Inches(0.5)
@@ -177,7 +305,7 @@ def _init_document(document, header=True):
     ul_style.paragraph_format.space_before = Pt(2)
 
 
-def _add_paragraph(document, runs, style='Normal'):
+def _add_paragraph(document, runs, style='Normal', style_id=None):
     _string = ''.join(runs).strip()
     if _string.startswith("<!--"):  # <!-- comment -->
         return
@@ -189,7 +317,11 @@ def _add_paragraph(document, runs, style='Normal'):
     elif style == "subtitle":
         _add_subtitle(document, _string)
     else:
-        pp = document.add_paragraph(style=style)
+        if style_id is None:
+            pp = document.add_paragraph(style=style)
+        else:
+            pp = document.add_paragraph()
+            pp._p.style = style_id(style)
         for run in runs[:-1]:
             _normal, _bold, *_ = run.split('**')
             if len(_normal := _normal.lstrip()) > 0:
@@ -0,0 +1,177 @@
+"""
+Hash-keyed job store
+
+One SQLite row per job hash holding the compressed page HTML, the parsed `__NEXT_DATA__`
+dict and the markdown description. Replaces the `urls/`, `dicts/` and `jobs/` file triplets
+keyed by `{position}.{hash}`.
+
+Usage:
+>>> from job_search.store import get_job, put_job
+>>> put_job(hash, html=html, data=next_data_dict, md=job_description)
+>>> get_job(hash)['data']
+"""
+
+from functools import cache
+import json
+from pathlib import Path
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+from job_search.config import P_CACHE, P_STORE
+
+FIELDS = ("position", "html", "data", "md", "updated")
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    hash TEXT PRIMARY KEY,
+    position TEXT,
+    html BLOB,
+    data BLOB,
+    md TEXT,
+    updated REAL
+)
+"""
+_CHUNK = 900  # stay under SQLite's bound-parameter limit
+_lock = threading.Lock()
+
+
+@cache
+def connect(path: Path = P_STORE) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(path, check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute(_SCHEMA)
+    return con
+
+
+def _pack(text: str | None) -> bytes | None:
+    return None if text is None else zlib.compress(text.encode(), 6)
+
+
+def _unpack(blob: bytes | None) -> str | None:
+    return None if blob is None else zlib.decompress(blob).decode()
+
+
+def _decode(row: tuple, fields) -> dict:
+    job = dict(zip(fields, row))
+    if "html" in job:
+        job["html"] = _unpack(job["html"])
+    if "data" in job:
+        _data = _unpack(job["data"])
+        job["data"] = None if _data is None else json.loads(_data)
+    return job
+
+
+def put_job(hash: str, html=None, data=None, md=None, position=None, path: Path = P_STORE):
+    """Insert or update a job; fields left as None keep their stored value"""
+    put_jobs([(hash, position, html, data, md)], path=path)
+
+
+def put_jobs(rows, path: Path = P_STORE):
+    """Bulk `put_job` from (hash, position, html, data, md) tuples"""
+    _now = time.time()
+    params = [
+        (hash, position, _pack(html), None if data is None else _pack(json.dumps(data)), md, _now)
+        for hash, position, html, data, md in rows
+    ]
+    con = connect(path)
+    with _lock, con:
+        con.executemany(
+            """
+            INSERT INTO jobs (hash, position, html, data, md, updated) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(hash) DO UPDATE SET
+                position = COALESCE(excluded.position, position),
+                html = COALESCE(excluded.html, html),
+                data = COALESCE(excluded.data, data),
+                md = COALESCE(excluded.md, md),
+                updated = excluded.updated
+            """,
+            params,
+        )
+
+
+def get_job(hash: str, fields=("data", "md"), path: Path = P_STORE) -> dict | None:
+    """Look up one job by hash (primary-key lookup)"""
+    fields = tuple(fields)
+    row = connect(path).execute(
+        f"SELECT {', '.join(fields)} FROM jobs WHERE hash = ?", (hash,)
+    ).fetchone()
+    return None if row is None else _decode(row, fields)
+
+
+def get_jobs(hashes=None, fields=("data", "md"), path: Path = P_STORE) -> dict[str, dict]:
+    """Bulk read jobs keyed by hash (all jobs when `hashes` is None)"""
+    fields = ("hash", *fields)
+    _select = f"SELECT {', '.join(fields)} FROM jobs"
+    con = connect(path)
+    if hashes is None:
+        rows = con.execute(_select).fetchall()
+    else:
+        hashes = list(hashes)
+        rows = []
+        for i in range(0, len(hashes), _CHUNK):
+            chunk = hashes[i : i + _CHUNK]
+            _where = f" WHERE hash IN ({', '.join('?' * len(chunk))})"
+            rows.extend(con.execute(_select + _where, chunk).fetchall())
+    jobs = (_decode(row, fields) for row in rows)
+    return {job.pop("hash"): job for job in jobs}
+
+
+def stored_hashes(hashes=None, field="data", path: Path = P_STORE) -> set[str]:
+    """Hashes (out of `hashes`, or all) whose `field` is stored"""
+    con = connect(path)
+    _select = f"SELECT hash FROM jobs WHERE {field} IS NOT NULL"
+    if hashes is None:
+        return {hash for (hash,) in con.execute(_select)}
+    hashes = list(hashes)
+    stored = set()
+    for i in range(0, len(hashes), _CHUNK):
+        chunk = hashes[i : i + _CHUNK]
+        _where = f" AND hash IN ({', '.join('?' * len(chunk))})"
+        stored.update(hash for (hash,) in con.execute(_select + _where, chunk))
+    return stored
+
+
+def migrate_cache(P_cache: Path = P_CACHE, suffixes=("", "_feb"), path: Path = P_STORE):
+    """Import the legacy `urls/`, `dicts/` and `jobs/` trees under `P_cache` into the store
+
+    Files are named `{position}.{hash}.html`, `{position}.{hash}.html.pkl` and
+    `{position}.{hash}.md`. Existing files are left in place.
+    """
+    from tqdm import tqdm
+
+    def _split(name: str, suffix: str) -> tuple[str, str]:
+        position, _, hash = name.removesuffix(suffix).rpartition(".")
+        return hash, position
+
+    n_jobs = 0
+    for _suffix in suffixes:
+        trees = {
+            "html": (P_cache / f"urls{_suffix}", ".html"),
+            "data": (P_cache / f"dicts{_suffix}", ".html.pkl"),
+            "md": (P_cache / f"jobs{_suffix}", ".md"),
+        }
+        for field, (P_tree, suffix) in trees.items():
+            if not P_tree.exists():
+                continue
+            rows = []
+            for P_file in tqdm(list(P_tree.glob(f"*{suffix}")), desc=str(P_tree)):
+                hash, position = _split(P_file.name, suffix)
+                if field == "data":
+                    with open(P_file, "rb") as f:
+                        value = pickle.load(f)
+                else:
+                    value = P_file.read_text(encoding="utf-8")
+                row = {"html": None, "data": None, "md": None, field: value}
+                rows.append((hash, position, row["html"], row["data"], row["md"]))
+                if len(rows) >= 500:
+                    put_jobs(rows, path=path)
+                    n_jobs += len(rows)
+                    rows = []
+            put_jobs(rows, path=path)
+            n_jobs += len(rows)
+    print(f"Migrated {n_jobs:,} files into {path}")
+    return n_jobs
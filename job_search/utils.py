@@ -1,14 +1,17 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 import importlib
 import os
 from pathlib import Path
+import re
 import sys
 from zoneinfo import ZoneInfo
 
-from IPython.display import HTML, Markdown, display
 import pandas as pd
 
 TZ_LA = ZoneInfo('America/Los_Angeles')
+HIGHLIGHT = '<span style="color: rebeccapurple">{}</span>'
+_POSITION_TRANSLATE = str.maketrans({**dict.fromkeys('/|:\\*?', "_"), '"': "'", "’": "'"})
 
 
 def reload(module=None):
@@ -21,6 +24,8 @@ def reload(module=None):
 
 
 def jupyter_css_style():
+    from IPython.display import HTML
+
     css_style = HTML("""
         <!-- https://stackoverflow.com/questions/71534901/make-tqdm-bar-dark-in-vscode-jupyter-notebook -->
         <style>
@@ -36,13 +41,51 @@ def jupyter_css_style():
     return css_style
 
 def tailwind_css():
+    from IPython.display import HTML
+
     return HTML('<script src="https://cdn.jsdelivr.net/npm/@tailwindcss/browser@4"></script>')
 
 def display_code(code: str, language: str = 'python'):
+    from IPython.display import Markdown, display
+
     markdown_code = f'```{language}\n{code}\n```'
     display(Markdown(markdown_code))
 
 
+@lru_cache(maxsize=4096)
+def _highlight_regex(terms: tuple[str, ...]) -> re.Pattern | None:
+    if not terms:
+        return None
+    # Longest first so "Spark SQL" wins over "Spark"; lookarounds act as \b even for "C++"
+    alternation = '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf'(?<!\w)(?:{alternation})(?!\w)')
+
+def highlight(text: str, terms, template: str = HIGHLIGHT) -> str:
+    """Wrap whole-word occurrences of `terms` in `template`, in a single pass
+
+    The escaped alternation is compiled once per set of terms.
+
+    >>> highlight('Python and C++ and AI', ['C++', 'Python', 'AI'])
+    """
+    regex = _highlight_regex(tuple(sorted({term for term in terms if term})))
+    if regex is None or not text:
+        return text
+    return regex.sub(lambda m: template.format(m.group(0)), text)
+
+
+def clean_position(company: pd.Series, title: pd.Series) -> pd.Series:
+    """File-name safe "{company} - {title}", cleaned once per unique pair"""
+    names = company.astype(object).fillna('') + " - " + title.astype(object)
+    codes, uniques = pd.factorize(names)
+    positions = (
+        pd.Series(uniques, dtype=object)
+        .str.translate(_POSITION_TRANSLATE)
+        .str.replace(r" +", " ", regex=True)
+        .str.strip()
+    )
+    return pd.Series(positions.to_numpy()[codes], index=company.index).where(codes >= 0)
+
+
 def now(time=True, file=True, days=0) -> str:
     datetime_now = datetime.now() - timedelta(days=days)
     if time:
@@ -0,0 +1,22 @@
+from job_search.cache import ResponseCache
+
+
+def test_spill_is_pruned(tmp_path):
+    path = tmp_path / "http.sqlite"
+    cache = ResponseCache(max_bytes=2**20, ttl=60, path=path, max_disk_bytes=2_000)
+    for i in range(50):
+        cache.set(f"url{i}", f"{i:04d}" * 500)
+    assert 0 < cache.disk_bytes <= 2_000
+    assert cache.get("url49") is not None
+
+    with cache._connect() as con:
+        con.execute("UPDATE responses SET time = time - 3600")
+    reopened = ResponseCache(ttl=60, path=path)
+    assert reopened.get("url49") is None
+    assert reopened.disk_bytes == 0
+
+
+def test_n_bytes_counts_utf8():
+    cache = ResponseCache(path=None)
+    cache.set("url", "héllo")
+    assert cache.n_bytes == 6
@@ -0,0 +1,40 @@
+import logging
+
+import pandas as pd
+
+from job_search import crawl, dataset
+
+
+def test_crawl_queues_unstored_cards(tmp_path, monkeypatch):
+    P_save_dict = {}
+    for query in ("DS", "MLE"):
+        for date in ("2026-01-01", "2026-01-02"):
+            P_save = tmp_path / date / query / f"{query}.html"
+            P_save.parent.mkdir(parents=True)
+            P_save.touch()
+        P_save_dict[query] = P_save
+    _cards = {
+        "DS": [("stored", "DS", "A"), ("unstored", "DS", "B")],
+        "MLE": [("stored", "MLE", "A"), ("unstored", "MLE", "B"), ("added", "MLE", "C")],
+    }
+    _cols = ["hash", "position", "title"]
+    jdf_dict = {query: pd.DataFrame(rows, columns=_cols) for query, rows in _cards.items()}
+    queued = {}
+
+    def _save_dicts(queue_df, **kwargs):
+        queued["hashes"] = queue_df["hash"].tolist()
+
+    _logger = logging.getLogger(__name__)
+    monkeypatch.setattr(crawl, "main0", lambda P_query, **kwargs: P_save_dict[P_query.stem])
+    monkeypatch.setattr(crawl, "load_jdf", lambda P_save: jdf_dict[P_save.parent.name])
+    monkeypatch.setattr(crawl, "_save_dicts", _save_dicts)
+    monkeypatch.setattr(crawl, "log", lambda P: _logger)
+    monkeypatch.setattr(crawl, "stored_hashes", lambda hashes: {"stored"})
+    # previous snapshots list the same cards, minus "added"
+    monkeypatch.setattr(dataset, "load_jdf", lambda P: jdf_dict[P.parent.name].iloc[:2])
+    monkeypatch.setattr(dataset, "stored_hashes", lambda hashes: {"stored"})
+    monkeypatch.setattr(dataset, "log", lambda P: _logger)
+
+    crawl.crawl(["DS", "MLE"], scroll_workers=1)
+
+    assert sorted(queued["hashes"]) == ["added", "unstored"]
@@ -0,0 +1,76 @@
+from functools import partial
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from job_search import dataset
+
+
+def _cards(rows):
+    return pd.DataFrame(rows, columns=["hash", "title", "company"])
+
+
+def test_delta_cards_requeues_unstored(tmp_path, monkeypatch):
+    P_prev = tmp_path / "2026-01-01" / "DS" / "DS.html"
+    P_save = tmp_path / "2026-01-02" / "DS" / "DS.html"
+    for P in (P_prev, P_save):
+        P.parent.mkdir(parents=True)
+        P.touch()
+    df_prev = _cards([("stored", "DS", "A"), ("unstored", "DS", "B"), ("changed", "DS", "C")])
+    df = _cards([("stored", "DS", "A"), ("unstored", "DS", "B"), ("changed", "MLE", "C"),
+                 ("added", "DS", "D")])
+    monkeypatch.setattr(dataset, "load_jdf", lambda P: df_prev)
+    monkeypatch.setattr(dataset, "stored_hashes", lambda hashes: {"stored", "changed"})
+    monkeypatch.setattr(dataset, "log", lambda P: logging.getLogger(__name__))
+
+    df_todo, refresh = dataset.delta_cards(P_save, df)
+
+    assert sorted(df_todo["hash"]) == ["added", "changed", "unstored"]
+    assert refresh == {"changed"}
+
+
+def test_save_job_without_job_data_is_refetched(tmp_path, monkeypatch):
+    from job_search import store
+
+    P_store = tmp_path / "jobs.sqlite"
+    monkeypatch.setattr(dataset, "put_job", partial(store.put_job, path=P_store))
+
+    dataset._save_job("h1", "<html><body>Rate limited</body></html>", position="A - DS")
+
+    assert store.stored_hashes(["h1"], path=P_store) == set()
+    assert store.get_job("h1", ["html"], path=P_store)["html"]
+
+
+def test_feature_engineering_matches_legacy(monkeypatch):
+    from job_search import config
+    from job_search.bench import _legacy_feature_engineering
+
+    P_data = Path(__file__).parents[1] / "data"
+    monkeypatch.setattr(config, "P_DATA", P_data)
+    monkeypatch.setattr(dataset, "P_DATA", P_data)
+    dataset._bay_cities_regex.cache_clear()
+    cards = pd.DataFrame({
+        "days": ["3d", "12h", "1w", "2mo", "1y"],
+        "company": ["Acme", None, "Beta: Labs", "Gamma", "Acme"],
+        "title": ["Data Scientist", "ML Engineer", "Analyst / BI", "Data  Engineer", "DS"],
+        "company_summary": ["a", "b", "c", "d", "e"],
+        "salary": ["$120k-$150k/yr", "$50-$60/hr", "$10k/mo", None, "$90k-$100k-$110k/yr"],
+        "yoe": ["0.5+ YOE", "3+ YOE", None, "10+ YOE", "2+ YOE"],
+        "mgmt": [None, "2+ YOE mgmt", None, "1.5+ YOE mgmt", None],
+        "location": ["San Francisco, California", "Oakland, California, United States",
+                     "Remote", "San Jose, California; Palo Alto, California", "New York"],
+    })
+
+    expected = _legacy_feature_engineering(cards.copy())
+    result = dataset._feature_engineering(cards.copy())
+
+    for col in ["hours", "position", "_position", "lower", "upper", "median", "yoe", "mgmt"]:
+        pd.testing.assert_series_equal(result[col], expected[col], check_dtype=False, rtol=1e-6)
+    for col in ["location", "company", "bay"]:
+        assert _objects(result[col]) == _objects(expected[col])
+
+
+def _objects(pd_series: pd.Series) -> list:
+    """Values as Python objects, nulls as None"""
+    return pd_series.astype(object).where(pd_series.notna(), None).tolist()
@@ -0,0 +1,19 @@
+from job_search.fetch import TieredGetter
+
+JOB_HTML = '<script id="__NEXT_DATA__">{"props": {"pageProps": {"job": {"id": 1}}}}</script>'
+
+
+def _fail(url):
+    raise ConnectionError(url)
+
+
+def test_tiered_getter_falls_back():
+    get = TieredGetter({"requests": lambda url: "<html></html>", "selenium": lambda url: JOB_HTML})
+    assert get("https://example.com/job") == JOB_HTML
+    assert get.counts == {"selenium": 1}
+
+
+def test_tiered_getter_returns_empty_when_every_tier_fails():
+    get = TieredGetter({"requests": lambda url: "<html></html>", "selenium": _fail})
+    assert get("https://example.com/job") == ""
+    assert get.counts == {"failed": 1}
@@ -0,0 +1,10 @@
+import pytest
+
+from job_search.bench import IMPORT_BUDGET_MS, bench_import
+
+
+@pytest.mark.parametrize("module", ["job_search.jobs", "job_search.index", "job_search.embed"])
+def test_import_is_light(module):
+    """Cold import within budget and without HEAVY_MODULES (raises otherwise)"""
+    results = bench_import((module,), check=True)
+    assert results[f"{module}_ms"] <= IMPORT_BUDGET_MS
@@ -0,0 +1,73 @@
+from functools import partial
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from job_search.index import JobIndex, ToolIndex
+
+
+def test_tool_index_skips_null_tools():
+    tools = ToolIndex.build(pd.Series([["a", None], ["b"], None, [np.nan, "a"]]))
+    assert tools.isin(["b"]).tolist() == [False, True, False, False]
+    assert tools.isin(["a"]).tolist() == [True, False, False, True]
+    assert tools.counts().to_dict() == {"a": 2, "b": 1}
+
+
+@pytest.fixture
+def jobs_df():
+    return pd.DataFrame({
+        "_hash": [f"h{i}" for i in range(6)],
+        "title": ["Data Scientist", "ML Engineer", "Data Engineer", "Analyst",
+                  "Senior Data Scientist", "Python Developer"],
+        "_md": ["Python and SQL", "PyTorch, python", "dbt and Airflow, SQL", "Excel, SQL",
+                "Python, dbt", "Django, data entry"],
+    })
+
+
+@pytest.fixture
+def index(jobs_df):
+    return JobIndex.build(jobs_df, ["title", "_md"])
+
+
+def _contains(jobs_df, keyword):
+    """Reference `\\b{keyword}` match in any column (as `cmask`)"""
+    _texts = jobs_df["title"] + "\n" + jobs_df["_md"]
+    return _texts.str.contains(r"\b" + re.escape(keyword), case=False)
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("python", lambda c: c("python")),
+        ("python sql", lambda c: c("python") & c("sql")),
+        ("python AND sql", lambda c: c("python") & c("sql")),
+        ("sql OR dbt AND python", lambda c: c("sql") | (c("dbt") & c("python"))),
+        ("(sql OR dbt) AND python", lambda c: (c("sql") | c("dbt")) & c("python")),
+        ("NOT sql AND python", lambda c: ~c("sql") & c("python")),
+        ("NOT (sql OR python)", lambda c: ~(c("sql") | c("python"))),
+        ("NOT NOT sql", lambda c: c("sql")),
+        ('"data scientist" AND NOT senior', lambda c: c("data scientist") & ~c("senior")),
+        ('python AND NOT "data entry"', lambda c: c("python") & ~c("data entry")),
+        ("py", lambda c: c("py")),
+    ],
+)
+def test_search_matches_contains(jobs_df, index, query, expected):
+    mask = index.search(query)
+    reference = expected(partial(_contains, jobs_df))
+    assert mask.rows().tolist() == reference.tolist()
+    assert mask.count() == reference.sum()
+
+
+def test_search_named_masks(jobs_df, index):
+    senior = index.mask(_contains(jobs_df, "senior").to_numpy())
+    mask = index.search("data AND NOT senior", named={"senior": senior})
+    assert mask.rows().tolist() == (_contains(jobs_df, "data") & ~senior.rows()).tolist()
+
+
+@pytest.mark.parametrize("query", ["", "python AND", "NOT", "(python OR sql", "python)",
+                                   "python OR OR sql", "AND python", "()"])
+def test_search_rejects_malformed(index, query):
+    with pytest.raises(ValueError):
+        index.search(query)